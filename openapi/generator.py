@@ -1,16 +1,23 @@
 import json
 import yaml
 import sqlite3
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
+from collections import Counter
+from dataclasses import dataclass
 from datetime import datetime
 from urllib.parse import urlparse
 import re
-from datetime import datetime
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Import local discovery models
 try:
-    from discovery.models import APIEndpoint, HTTPMethod, AuthType, SecurityLevel
+    from discovery.models import HTTPMethod, AuthType, SecurityLevel
 except ImportError:
     # Fallback if discovery models not available
     from enum import Enum
@@ -35,11 +42,53 @@ except ImportError:
         MEDIUM = "medium"
         HIGH = "high"
         CRITICAL = "critical"
+
+# Shared leaf schemas. These are returned by reference from _infer_schema_from_data
+# and must be treated as read-only by everything downstream.
+_STRING_SCHEMA = {"type": "string"}
+_INTEGER_SCHEMA = {"type": "integer"}
+_NUMBER_SCHEMA = {"type": "number"}
+_BOOLEAN_SCHEMA = {"type": "boolean"}
+_OBJECT_SCHEMA = {"type": "object"}
+
+# Leaf schema for each scalar type json.loads can produce, keyed on the exact type
+_SCALAR_SCHEMAS = {
+    str: _STRING_SCHEMA,
+    int: _INTEGER_SCHEMA,
+    float: _NUMBER_SCHEMA,
+    bool: _BOOLEAN_SCHEMA,
+    type(None): _STRING_SCHEMA
+}
+
+def _write_json(data, path: str):
+    """Write data as JSON indented by two spaces, through orjson when installed"""
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
+
+# libyaml's C emitter when PyYAML was built with it, the pure-Python one otherwise
+_BaseDumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+class _SpecDumper(_BaseDumper):
+    """YAML dumper that writes shared schema objects inline instead of as anchors"""
     
-    class APIEndpoint:
-        def __init__(self, **kwargs):
-            for key, value in kwargs.items():
-                setattr(self, key, value)
+    def ignore_aliases(self, data):
+        return True
+
+# Descriptions for the status codes commonly seen in discovered traffic
+_STATUS_DESC = {
+    200: "OK",
+    201: "Created",
+    204: "No Content",
+    400: "Bad Request",
+    401: "Unauthorized",
+    403: "Forbidden",
+    404: "Not Found",
+    500: "Internal Server Error"
+}
 
 # Define OpenAPI model classes since they're not imported
 class Operation:
@@ -60,6 +109,11 @@ class Operation:
             if not exclude_none or value is not None:
                 if isinstance(value, list) and all(hasattr(item, 'dict') for item in value):
                     result[key] = [item.dict(exclude_none=exclude_none) for item in value]
+                elif isinstance(value, dict) and any(hasattr(item, 'dict') for item in value.values()):
+                    result[key] = {
+                        name: item.dict(exclude_none=exclude_none) if hasattr(item, 'dict') else item
+                        for name, item in value.items()
+                    }
                 elif hasattr(value, 'dict'):
                     result[key] = value.dict(exclude_none=exclude_none)
                 else:
@@ -133,6 +187,24 @@ class OpenAPISpec:
     def dict(self, exclude_none=True):
         return self.spec_dict
 
+@dataclass(slots=True)
+class LoadedEndpoint:
+    """Slim, slotted view of a discovered endpoint holding only the fields the generator reads"""
+    path: str
+    method: HTTPMethod
+    query_params: Dict[str, Any]
+    headers: Dict[str, str]
+    body: Optional[Dict[str, Any]]
+    status_code: Optional[int]
+    response_body: Optional[Dict[str, Any]]
+    auth_type: AuthType
+    has_auth: bool
+    security_level: SecurityLevel
+    contains_sensitive_data: bool
+    potential_idor: bool
+    missing_auth: bool
+    discovered_at: str
+
 class OpenAPIGenerator:
     """Generator for converting discovered API traffic to OpenAPI 3.0 specifications"""
     
@@ -140,47 +212,49 @@ class OpenAPIGenerator:
         self.db_path = db_path
         self.generated_schemas = {}
         
-    def load_discovered_endpoints(self) -> List[APIEndpoint]:
+    def load_discovered_endpoints(self, include_response_body: bool = True) -> List[LoadedEndpoint]:
         """Load discovered endpoints from database"""
         try: 
             conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
+            
+            # Callers that never read response bodies skip decoding them entirely
+            response_body_column = "response_body" if include_response_body else "NULL AS response_body"
         
-            cursor.execute('''
+            cursor.execute(f'''
                 SELECT 
-                    path, method, host, port, scheme, query_params, headers, body,
-                    status_code, response_headers, response_body, auth_type, has_auth,
-                    security_level, contains_sensitive_data, potential_idor, missing_auth,
-                    discovered_at, last_seen, request_count
+                    path, method, query_params, headers, body, status_code, {response_body_column},
+                    auth_type, has_auth, security_level, contains_sensitive_data,
+                    potential_idor, missing_auth, discovered_at
                 FROM endpoints
                 ORDER BY path, method
             ''')
         
             endpoints = []
-            for row in cursor.fetchall():
-                endpoint = APIEndpoint(
-                    path=row[0],
-                    method=HTTPMethod(row[1]),
-                    host=row[2],
-                    port=row[3],
-                    scheme=row[4],
-                    query_params=json.loads(row[5]) if row[5] else {},
-                    headers=json.loads(row[6]) if row[6] else {},
-                    body=json.loads(row[7]) if row[7] else None,
-                    status_code=row[8],
-                    response_headers=json.loads(row[9]) if row[9] else {},
-                    response_body=json.loads(row[10]) if row[10] else None,
-                    auth_type=AuthType(row[11]),
-                    has_auth=bool(row[12]),
-                    security_level=SecurityLevel(row[13]),
-                    contains_sensitive_data=bool(row[14]),
-                    potential_idor=bool(row[15]),
-                    missing_auth=bool(row[16]),
-                    discovered_at=row[17],
-                    last_seen=row[18],
-                    request_count=row[19]
-                )
-                endpoints.append(endpoint)
+            while True:
+                rows = cursor.fetchmany(1000)
+                if not rows:
+                    break
+                
+                for row in rows:
+                    endpoint = LoadedEndpoint(
+                        path=row["path"],
+                        method=HTTPMethod(row["method"]),
+                        query_params=json.loads(row["query_params"]) if row["query_params"] else {},
+                        headers=json.loads(row["headers"]) if row["headers"] else {},
+                        body=json.loads(row["body"]) if row["body"] else None,
+                        status_code=row["status_code"],
+                        response_body=json.loads(row["response_body"]) if row["response_body"] else None,
+                        auth_type=AuthType(row["auth_type"]),
+                        has_auth=bool(row["has_auth"]),
+                        security_level=SecurityLevel(row["security_level"]),
+                        contains_sensitive_data=bool(row["contains_sensitive_data"]),
+                        potential_idor=bool(row["potential_idor"]),
+                        missing_auth=bool(row["missing_auth"]),
+                        discovered_at=row["discovered_at"]
+                    )
+                    endpoints.append(endpoint)
         
             conn.close()
             return endpoints
@@ -188,10 +262,26 @@ class OpenAPIGenerator:
             print(f"Warning: Could not load endpoints from database: {e}")
             return []
     
-    def generate_openapi_spec(self, title: str = "Discovered API", version: str = "1.0.0") -> OpenAPISpec:
+    def count_endpoints(self) -> int:
+        """Count discovered endpoints without loading them"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                return conn.execute("SELECT COUNT(*) FROM endpoints").fetchone()[0]
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"Warning: Could not count endpoints in database: {e}")
+            return 0
+    
+    def generate_openapi_spec(self, title: str = "Discovered API", version: str = "1.0.0",
+                              endpoints: Optional[List[LoadedEndpoint]] = None) -> OpenAPISpec:
         """Generate OpenAPI specification from discovered endpoints"""
         
-        endpoints = self.load_discovered_endpoints()
+        if endpoints is None:
+            endpoints = self.load_discovered_endpoints()
+        summary = self._summarize(endpoints)
+        generated_at = datetime.utcnow().isoformat()
         
         # Group endpoints by path
         paths = {}
@@ -212,7 +302,7 @@ class OpenAPIGenerator:
             "info": {
                 "title": title,
                 "version": version,
-                "description": f"Auto-generated API specification from discovered traffic. Generated on {datetime.utcnow().isoformat()}",
+                "description": f"Auto-generated API specification from discovered traffic. Generated on {generated_at}",
                 "contact": {
                     "name": "LevoLite API Discovery",
                     "url": "https://github.com/levolite"
@@ -225,17 +315,17 @@ class OpenAPIGenerator:
                     "description": "Development server"
                 }
             ],
-            "components": self._create_components(endpoints)
+            "components": self._create_components(summary)
         }
         
         # Add global security if needed
-        security = self._create_global_security(endpoints)
+        security = self._create_global_security(summary)
         if security:
             openapi_spec["security"] = security
 
         return OpenAPISpec(openapi_spec)
     
-    def _create_operation(self, endpoint: APIEndpoint) -> Operation:
+    def _create_operation(self, endpoint: LoadedEndpoint) -> Operation:
         """Create an OpenAPI operation from an endpoint"""
         
         # Generate operation ID
@@ -274,20 +364,19 @@ class OpenAPIGenerator:
         """Generate a unique operation ID"""
         # Convert path to camelCase
         path_parts = path.strip('/').split('/')
-        operation_id = method.value.lower()
+        parts = [method.value.lower()]
         
         for part in path_parts:
             if part.startswith('{') and part.endswith('}'):
                 # Path parameter
-                param_name = part[1:-1]
-                operation_id += f"By{param_name.capitalize()}"
+                parts.append(f"By{part[1:-1].capitalize()}")
             else:
                 # Regular path part
-                operation_id += part.capitalize()
+                parts.append(part.capitalize())
         
-        return operation_id
+        return "".join(parts)
     
-    def _extract_parameters(self, endpoint: APIEndpoint) -> List[Parameter]:
+    def _extract_parameters(self, endpoint: LoadedEndpoint) -> List[Parameter]:
         """Extract parameters from endpoint"""
         parameters = []
         
@@ -298,7 +387,7 @@ class OpenAPIGenerator:
                 name=param_name,
                 in_="path",
                 required=True,
-                schema={"type": "string"},
+                schema=_STRING_SCHEMA,
                 description=f"ID of the {param_name.replace('_', ' ')}"
             ))
         
@@ -315,7 +404,7 @@ class OpenAPIGenerator:
         
         return parameters
     
-    def _create_request_body(self, endpoint: APIEndpoint) -> Optional[RequestBody]:
+    def _create_request_body(self, endpoint: LoadedEndpoint) -> Optional[RequestBody]:
         """Create request body from endpoint"""
         if not endpoint.body or endpoint.method in [HTTPMethod.GET, HTTPMethod.DELETE, HTTPMethod.HEAD, HTTPMethod.OPTIONS]:
             return None
@@ -337,7 +426,7 @@ class OpenAPIGenerator:
             }
         )
     
-    def _create_responses(self, endpoint: APIEndpoint) -> Dict[str, Response]:
+    def _create_responses(self, endpoint: LoadedEndpoint) -> Dict[str, Response]:
         """Create responses from endpoint"""
         responses = {}
         
@@ -377,7 +466,7 @@ class OpenAPIGenerator:
         
         return responses
     
-    def _create_security_requirement(self, endpoint: APIEndpoint) -> Optional[List[Dict[str, List[str]]]]:
+    def _create_security_requirement(self, endpoint: LoadedEndpoint) -> Optional[List[Dict[str, List[str]]]]:
         """Create security requirements for endpoint"""
         if not endpoint.has_auth:
             return None
@@ -391,26 +480,36 @@ class OpenAPIGenerator:
         else:
             return None
     
-    def _create_components(self, endpoints: List[APIEndpoint]) -> Dict[str, Any]:
+    def _summarize(self, endpoints: List[LoadedEndpoint]) -> Tuple[Dict[str, Any], Counter, bool]:
+        """Collect component schemas and auth-type counts in a single pass over endpoints"""
+        schemas_to_build = {}
+        auth_counter = Counter()
+        
+        for endpoint in endpoints:
+            if endpoint.body:
+                schemas_to_build[self._generate_schema_name(endpoint.path, "Request")] = endpoint.body
+            
+            if endpoint.response_body:
+                schemas_to_build[self._generate_schema_name(endpoint.path, "Response")] = endpoint.response_body
+            
+            if endpoint.has_auth:
+                auth_counter[endpoint.auth_type] += 1
+        
+        return schemas_to_build, auth_counter, bool(auth_counter)
+    
+    def _create_components(self, summary: Tuple[Dict[str, Any], Counter, bool]) -> Dict[str, Any]:
         """Create components section"""
+        schemas_to_build, auth_types, _ = summary
         components = {
             "schemas": {},
             "securitySchemes": {}
         }
         
         # Generate schemas from request/response bodies
-        for endpoint in endpoints:
-            if endpoint.body:
-                schema_name = self._generate_schema_name(endpoint.path, "Request")
-                components["schemas"][schema_name] = self._infer_schema_from_data(endpoint.body)
-            
-            if endpoint.response_body:
-                schema_name = self._generate_schema_name(endpoint.path, "Response")
-                components["schemas"][schema_name] = self._infer_schema_from_data(endpoint.response_body)
+        for schema_name, data in schemas_to_build.items():
+            components["schemas"][schema_name] = self._infer_schema_from_data(data)
         
         # Add security schemes
-        auth_types = set(endpoint.auth_type for endpoint in endpoints if endpoint.has_auth)
-        
         if AuthType.BEARER in auth_types:
             components["securitySchemes"]["bearerAuth"] = {
                 "type": "http",
@@ -433,18 +532,14 @@ class OpenAPIGenerator:
         
         return components
     
-    def _create_global_security(self, endpoints: List[APIEndpoint]) -> Optional[List[Dict[str, List[str]]]]:
+    def _create_global_security(self, summary: Tuple[Dict[str, Any], Counter, bool]) -> Optional[List[Dict[str, List[str]]]]:
         """Create global security schemes"""
-        auth_endpoints = [e for e in endpoints if e.has_auth]
-        if not auth_endpoints:
+        _, auth_types, any_auth = summary
+        if not any_auth:
             return None
         
         # Use the most common auth type
-        auth_types = {}
-        for endpoint in auth_endpoints:
-            auth_types[endpoint.auth_type] = auth_types.get(endpoint.auth_type, 0) + 1
-        
-        most_common = max(auth_types.items(), key=lambda x: x[1])[0]
+        most_common = auth_types.most_common(1)[0][0]
         
         if most_common == AuthType.BEARER:
             return [{"bearerAuth": []}]
@@ -455,7 +550,7 @@ class OpenAPIGenerator:
         
         return None
     
-    def _generate_summary(self, endpoint: APIEndpoint) -> str:
+    def _generate_summary(self, endpoint: LoadedEndpoint) -> str:
         """Generate operation summary"""
         method = endpoint.method.value
         path = endpoint.path
@@ -479,23 +574,23 @@ class OpenAPIGenerator:
         else:
             return f"{method} {path.strip('/').replace('/', ' ')}"
     
-    def _generate_description(self, endpoint: APIEndpoint) -> str:
+    def _generate_description(self, endpoint: LoadedEndpoint) -> str:
         """Generate operation description"""
-        description = f"Endpoint discovered on {endpoint.discovered_at}"
+        clauses = [f"Endpoint discovered on {endpoint.discovered_at}"]
         
         if endpoint.contains_sensitive_data:
-            description += "\n\n⚠️ **Contains sensitive data**"
+            clauses.append("⚠️ **Contains sensitive data**")
         
         if endpoint.potential_idor:
-            description += "\n\n🚨 **Potential IDOR vulnerability detected**"
+            clauses.append("🚨 **Potential IDOR vulnerability detected**")
         
         if endpoint.missing_auth:
-            description += "\n\n🔒 **Missing authentication on sensitive endpoint**"
+            clauses.append("🔒 **Missing authentication on sensitive endpoint**")
         
         if endpoint.has_auth:
-            description += f"\n\n🔐 **Requires {endpoint.auth_type.value} authentication**"
+            clauses.append(f"🔐 **Requires {endpoint.auth_type.value} authentication**")
         
-        return description
+        return "\n\n".join(clauses)
     
     def _extract_tags(self, path: str) -> List[str]:
         """Extract tags from path"""
@@ -527,6 +622,10 @@ class OpenAPIGenerator:
     
     def _infer_schema_from_data(self, data: Any) -> Dict[str, Any]:
         """Infer JSON schema from data"""
+        scalar_schema = _SCALAR_SCHEMAS.get(type(data))
+        if scalar_schema is not None:
+            return scalar_schema
+        
         if isinstance(data, dict):
             properties = {}
             required = []
@@ -545,21 +644,21 @@ class OpenAPIGenerator:
             if data:
                 items_schema = self._infer_schema_from_data(data[0])
             else:
-                items_schema = {"type": "object"}
+                items_schema = _OBJECT_SCHEMA
             
             return {"type": "array", "items": items_schema}
         
         elif isinstance(data, bool):
-            return {"type": "boolean"}
+            return _BOOLEAN_SCHEMA
         
         elif isinstance(data, int):
-            return {"type": "integer"}
+            return _INTEGER_SCHEMA
         
         elif isinstance(data, float):
-            return {"type": "number"}
+            return _NUMBER_SCHEMA
         
         else:
-            return {"type": "string"}
+            return _STRING_SCHEMA
     
     def _generate_schema_name(self, path: str, suffix: str) -> str:
         """Generate schema name from path"""
@@ -570,47 +669,40 @@ class OpenAPIGenerator:
     
     def _get_status_description(self, status_code: int) -> str:
         """Get description for status code"""
-        descriptions = {
-            200: "OK",
-            201: "Created",
-            204: "No Content",
-            400: "Bad Request",
-            401: "Unauthorized",
-            403: "Forbidden",
-            404: "Not Found",
-            500: "Internal Server Error"
-        }
-        return descriptions.get(status_code, f"Status {status_code}")
+        return _STATUS_DESC.get(status_code, f"Status {status_code}")
     
-    def export_yaml(self, output_file: str = "openapi.yaml") -> str:
+    def export_yaml(self, output_file: str = "openapi.yaml",
+                    endpoints: Optional[List[LoadedEndpoint]] = None) -> str:
         """Export OpenAPI spec to YAML"""
-        spec = self.generate_openapi_spec()
+        spec = self.generate_openapi_spec(endpoints=endpoints)
         
         # Convert to dict
         spec_dict = spec.dict(exclude_none=True)
         
         # Write to file
         with open(output_file, 'w') as f:
-            yaml.dump(spec_dict, f, default_flow_style=False, sort_keys=False)
+            yaml.dump(spec_dict, f, Dumper=_SpecDumper, default_flow_style=False, sort_keys=False)
         
         return f"OpenAPI spec exported to {output_file}"
     
-    def export_json(self, output_file: str = "openapi.json") -> str:
+    def export_json(self, output_file: str = "openapi.json",
+                    endpoints: Optional[List[LoadedEndpoint]] = None) -> str:
         """Export OpenAPI spec to JSON"""
-        spec = self.generate_openapi_spec()
+        spec = self.generate_openapi_spec(endpoints=endpoints)
         
         # Convert to dict
         spec_dict = spec.dict(exclude_none=True)
         
         # Write to file
-        with open(output_file, 'w') as f:
-            json.dump(spec_dict, f, indent=2)
+        _write_json(spec_dict, output_file)
         
         return f"OpenAPI spec exported to {output_file}"
     
-    def export_postman(self, output_file: str = "postman_collection.json") -> str:
+    def export_postman(self, output_file: str = "postman_collection.json",
+                       endpoints: Optional[List[LoadedEndpoint]] = None) -> str:
         """Export to Postman collection format"""
-        endpoints = self.load_discovered_endpoints()
+        if endpoints is None:
+            endpoints = self.load_discovered_endpoints(include_response_body=False)
         
         collection = {
             "info": {
@@ -689,7 +781,30 @@ class OpenAPIGenerator:
             collection["item"].append(folder)
         
         # Write to file
-        with open(output_file, 'w') as f:
-            json.dump(collection, f, indent=2)
+        _write_json(collection, output_file)
         
-        return f"Postman collection exported to {output_file}"
\ No newline at end of file
+        return f"Postman collection exported to {output_file}"
+    
+    def export_all(self, output_dir: str = ".") -> List[str]:
+        """Export YAML, JSON and Postman outputs in parallel from a single database load"""
+        endpoints = self.load_discovered_endpoints()
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+        
+        jobs = [
+            ("yaml", str(Path(output_dir) / "openapi.yaml")),
+            ("json", str(Path(output_dir) / "openapi.json")),
+            ("postman", str(Path(output_dir) / "postman_collection.json"))
+        ]
+        
+        with ProcessPoolExecutor(max_workers=len(jobs)) as executor:
+            futures = [
+                executor.submit(_export_worker, self.db_path, export_format, output_file, endpoints)
+                for export_format, output_file in jobs
+            ]
+            return [future.result() for future in futures]
+
+def _export_worker(db_path: str, export_format: str, output_file: str,
+                   endpoints: List[LoadedEndpoint]) -> str:
+    """Run a single exporter in a worker process (module-level so it can be pickled)"""
+    generator = OpenAPIGenerator(db_path)
+    return getattr(generator, f"export_{export_format}")(output_file, endpoints)
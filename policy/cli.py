@@ -4,17 +4,45 @@ CLI interface for LevoLite Policy Engine
 """
 
 import argparse
+import contextlib
+import io
+import itertools
 import json
 import os
 import sys
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional
 
-from models import PolicyConfig, PolicyRule, PolicyCondition, PolicyAction
-from engine import PolicyEngine
+# The engine and models pull in pydantic; import them inside the handlers
+# that need them so --help and argument errors stay cheap.
+if TYPE_CHECKING:
+    from models import PolicyConfig
 
-def create_default_config() -> PolicyConfig:
-    """Create default policy engine configuration"""
+@lru_cache(maxsize=None)
+def _yaml():
+    """Import PyYAML on first use"""
+    import yaml
+    return yaml
+
+def _yaml_load(stream):
+    """Safe-load YAML, through libyaml when PyYAML was built with it"""
+    yaml = _yaml()
+    return yaml.load(stream, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
+
+def _yaml_dump(data, stream):
+    """Safe-dump YAML in the layout used for policy files"""
+    yaml = _yaml()
+    yaml.dump(data, stream, Dumper=getattr(yaml, 'CSafeDumper', yaml.SafeDumper),
+              default_flow_style=False, indent=2)
+
+@lru_cache(maxsize=1)
+def create_default_config() -> "PolicyConfig":
+    """Create default policy engine configuration (shared; copy before changing it)"""
+    from models import PolicyConfig
     return PolicyConfig(
         enable_realtime_evaluation=True,
         enable_blocking=False,
@@ -28,17 +56,25 @@ def create_default_config() -> PolicyConfig:
         policy_directory="policies"
     )
 
-def main():
-    """Main CLI entry point"""
+def _build_root_parser():
+    """Create the top-level parser with an empty subcommand table"""
     parser = argparse.ArgumentParser(description="LevoLite Policy Engine")
     subparsers = parser.add_subparsers(dest='command', help='Available commands')
-    
-    # Evaluate command
+    return parser, subparsers
+
+def _build_evaluate(subparsers):
+    """Add the evaluate subcommand"""
     evaluate_parser = subparsers.add_parser('evaluate', help='Evaluate API traffic against policies')
     evaluate_parser.add_argument('--input', required=True,
                                help='Input file with API traffic data (JSON)')
+    evaluate_parser.add_argument('--jsonl', action='store_true',
+                               help='Read input as JSON Lines, one record per line '
+                                    '(implied by .jsonl/.ndjson)')
     evaluate_parser.add_argument('--output', default='policy_report.json',
                                help='Output report file (default: policy_report.json)')
+    evaluate_parser.add_argument('--evaluations-file', metavar='FILE',
+                               help='Stream detailed evaluations to this JSON Lines file '
+                                    'instead of keeping them in memory')
     evaluate_parser.add_argument('--format', choices=['json', 'html', 'markdown'],
                                default='json',
                                help='Report format (default: json)')
@@ -46,16 +82,18 @@ def main():
                                help='Target API URL (default: http://localhost:8000)')
     evaluate_parser.add_argument('--policy-dir', default='policies',
                                help='Policy directory (default: policies)')
-    
-    # Test command
+
+def _build_test(subparsers):
+    """Add the test subcommand"""
     test_parser = subparsers.add_parser('test', help='Test policy evaluation with sample data')
     test_parser.add_argument('--sample', choices=['security', 'compliance', 'all'],
                            default='all',
                            help='Sample data to test (default: all)')
     test_parser.add_argument('--output', default='test_policy_report.json',
                            help='Output file (default: test_policy_report.json)')
-    
-    # Rules command
+
+def _build_rules(subparsers):
+    """Add the rules subcommand"""
     rules_parser = subparsers.add_parser('rules', help='Manage policy rules')
     rules_parser.add_argument('--list', action='store_true',
                             help='List all policy rules')
@@ -67,8 +105,9 @@ def main():
                             help='Enable policy rule')
     rules_parser.add_argument('--disable', metavar='RULE_NAME',
                             help='Disable policy rule')
-    
-    # Report command
+
+def _build_report(subparsers):
+    """Add the report subcommand"""
     report_parser = subparsers.add_parser('report', help='Generate report from evaluation results')
     report_parser.add_argument('--input', required=True,
                              help='Input evaluation results file')
@@ -77,28 +116,140 @@ def main():
     report_parser.add_argument('--format', choices=['html', 'markdown', 'json'],
                              default='html',
                              help='Report format (default: html)')
-    
-    # Info command
+
+def _build_info(subparsers):
+    """Add the info subcommand"""
     info_parser = subparsers.add_parser('info', help='Show policy engine information')
     info_parser.add_argument('--detailed', action='store_true',
                            help='Show detailed policy information')
+
+# Subcommand builders in help order
+BUILDERS = {
+    'evaluate': _build_evaluate,
+    'test': _build_test,
+    'rules': _build_rules,
+    'report': _build_report,
+    'info': _build_info,
+}
+
+def main():
+    """Main CLI entry point"""
+    parser, subparsers = _build_root_parser()
+    
+    # Only the chosen subcommand needs its arguments; help, no command and
+    # unknown commands get the full table so argparse can list the choices.
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command in BUILDERS:
+        BUILDERS[command](subparsers)
+    else:
+        for build in BUILDERS.values():
+            build(subparsers)
     
     args = parser.parse_args()
     
-    if not args.command:
+    handler = _DISPATCH.get(args.command)
+    if handler is None:
         parser.print_help()
         return
     
-    if args.command == 'evaluate':
-        run_evaluation(args)
-    elif args.command == 'test':
-        run_test(args)
-    elif args.command == 'rules':
-        manage_rules(args)
-    elif args.command == 'report':
-        generate_report(args)
-    elif args.command == 'info':
-        show_info(args)
+    handler(args)
+
+JSONL_SUFFIXES = ('.jsonl', '.ndjson')
+
+def iter_traffic(path: str, jsonl: bool = False):
+    """Yield traffic records one at a time from a JSON array or JSON Lines file"""
+    with open(path, 'rb') as f:
+        if jsonl or path.lower().endswith(JSONL_SUFFIXES):
+            # One record per line; orjson parses bytes directly when installed
+            try:
+                from orjson import loads
+            except ImportError:
+                loads = json.loads
+            
+            for line in f:
+                if line.strip():
+                    yield loads(line)
+            return
+        
+        # A JSON array streams record by record through ijson when it is installed
+        try:
+            import ijson
+        except ImportError:
+            ijson = None
+        
+        if ijson is not None:
+            yield from ijson.items(f, 'item', use_float=True)
+        else:
+            yield from json.load(f)
+
+def exchange_args(item) -> dict:
+    """Engine evaluation arguments for one traffic record"""
+    return dict(
+        endpoint=item.get('endpoint', ''),
+        method=item.get('method', 'GET'),
+        request_headers=item['request'].get('headers', {}),
+        request_body=item['request'].get('body'),
+        response_status=item['response'].get('status', 200),
+        response_headers=item['response'].get('headers', {}),
+        response_body=item['response'].get('body')
+    )
+
+# Records per task handed to a worker process
+EVALUATION_BATCH_SIZE = 512
+
+def iter_batches(traffic, size: int = EVALUATION_BATCH_SIZE):
+    """Group evaluable traffic records into lists of at most size"""
+    batch = []
+    for item in traffic:
+        if 'request' in item and 'response' in item:
+            batch.append(item)
+            if len(batch) == size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+_worker_engine = None
+
+def _init_worker(config):
+    """Build the policy engine once per worker process"""
+    global _worker_engine
+    from engine import PolicyEngine
+    # The parent appends every evaluation to the evaluations file itself
+    config = config.model_copy(update={'evaluations_path': None})
+    # The parent already reported which policies were loaded
+    with contextlib.redirect_stdout(io.StringIO()):
+        _worker_engine = PolicyEngine(config)
+    _worker_engine.precompile()
+
+def _evaluate_batch(batch: list) -> list:
+    """Evaluate a batch in a worker and return its evaluations"""
+    _worker_engine.clear_evaluations()
+    # The parent runs the actions as it ingests, so their output keeps input order
+    with contextlib.redirect_stdout(io.StringIO()):
+        return _worker_engine.evaluate_batch(map(exchange_args, batch))
+
+def evaluate_traffic(engine, config, traffic):
+    """Evaluate traffic, spreading batches over worker processes when there is more than one"""
+    batches = iter_batches(traffic)
+    head = list(itertools.islice(batches, 2))
+    workers = os.cpu_count() or 1
+    
+    if len(head) < 2 or workers == 1:
+        for batch in itertools.chain(head, batches):
+            engine.evaluate_batch(map(exchange_args, batch))
+        return
+    
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(config,)) as executor:
+        # Keep a bounded number of batches in flight so the input still streams
+        pending = deque(executor.submit(_evaluate_batch, batch) for batch in head)
+        for batch in batches:
+            if len(pending) >= workers * 2:
+                engine.ingest(pending.popleft().result())
+            pending.append(executor.submit(_evaluate_batch, batch))
+        while pending:
+            engine.ingest(pending.popleft().result())
 
 def run_evaluation(args):
     """Run policy evaluation on API traffic"""
@@ -109,38 +260,31 @@ def run_evaluation(args):
         sys.exit(1)
     
     try:
-        # Load traffic data
-        with open(args.input, 'r') as f:
-            traffic_data = json.load(f)
-        
         # Create policy config
-        config = create_default_config()
-        config.policy_directory = args.policy_dir
+        config = create_default_config().model_copy(update={'policy_directory': args.policy_dir})
+        if args.evaluations_file:
+            config = config.model_copy(update={'evaluations_path': args.evaluations_file,
+                                               'max_evaluations_retained': 0})
         
         # Create policy engine
-        engine = PolicyEngine(config)
-        
-        # Evaluate each request/response
-        for item in traffic_data:
-            if 'request' in item and 'response' in item:
-                evaluation = engine.evaluate_request_response(
-                    endpoint=item.get('endpoint', ''),
-                    method=item.get('method', 'GET'),
-                    request_headers=item['request'].get('headers', {}),
-                    request_body=item['request'].get('body'),
-                    response_status=item['response'].get('status', 200),
-                    response_headers=item['response'].get('headers', {}),
-                    response_body=item['response'].get('body')
-                )
-        
-        # Generate report
-        report = engine.generate_report(args.target_api)
-        
-        # Save report
-        save_report(report, args.output, args.format)
-        
-        # Print summary
-        print_summary(report)
+        from engine import PolicyEngine
+        with PolicyEngine(config) as engine:
+            engine.precompile()
+            
+            # Evaluate each request/response as it is read
+            evaluate_traffic(engine, config, iter_traffic(args.input, args.jsonl))
+            
+            # Generate report
+            if args.evaluations_file:
+                report = engine.generate_streaming_report(args.target_api)
+            else:
+                report = engine.generate_report(args.target_api)
+            
+            # Save report
+            save_report(report, args.output, args.format)
+            
+            # Print summary
+            print_summary(report)
         
     except Exception as e:
         print(f"❌ Evaluation failed: {e}")
@@ -154,8 +298,10 @@ def run_test(args):
     sample_data = create_sample_traffic_data(args.sample)
     
     # Create policy engine
+    from engine import PolicyEngine
     config = create_default_config()
     engine = PolicyEngine(config)
+    engine.precompile()
     
     # Evaluate sample data
     for item in sample_data:
@@ -173,8 +319,8 @@ def run_test(args):
     report = engine.generate_report("http://localhost:8000")
     
     # Save results
-    with open(args.output, 'w') as f:
-        json.dump(report.dict(), f, indent=2, default=str)
+    with open(args.output, 'wb') as f:
+        f.write(report.model_dump_json(indent=2).encode())
     
     print(f"✅ Test completed. Results saved to {args.output}")
     print_summary(report)
@@ -267,20 +413,47 @@ def manage_rules(args):
 
 def list_rules():
     """List all policy rules"""
+    from engine import PolicyEngine
     config = create_default_config()
     engine = PolicyEngine(config)
     
-    print("📋 Policy Rules")
-    print("=" * 60)
-    
+    lines = ["📋 Policy Rules", "=" * 60]
     for rule in engine.rules:
-        print(f"\n🔍 {rule.name}")
-        print(f"   Type: {rule.rule_type.value}")
-        print(f"   Severity: {rule.severity.value}")
-        print(f"   Enabled: {rule.enabled}")
-        print(f"   Description: {rule.description}")
-        print(f"   Conditions: {len(rule.conditions)}")
-        print(f"   Actions: {len(rule.actions)}")
+        lines.extend(format_rule(rule))
+    
+    sys.stdout.write("\n".join(lines) + "\n")
+
+def format_rule(rule, detailed: bool = False) -> List[str]:
+    """Format one rule as output lines, optionally listing its conditions and actions"""
+    conditions, actions = rule.conditions, rule.actions
+    lines = [
+        f"\n🔍 {rule.name}",
+        f"   Type: {rule.rule_type.value}",
+        f"   Severity: {rule.severity.value}",
+        f"   Enabled: {rule.enabled}",
+        f"   Description: {rule.description}",
+        f"   Conditions: {len(conditions)}",
+    ]
+    if detailed:
+        lines.extend(f"     - {condition.type.value}: {condition.description}" for condition in conditions)
+    lines.append(f"   Actions: {len(actions)}")
+    if detailed:
+        lines.extend(f"     - {action.type.value}: {action.description}" for action in actions)
+    return lines
+
+def _find_rule_file(policy_dir: Path, rule_name: str) -> Optional[Path]:
+    """Policy file holding the named rule, or None when no file matches"""
+    for yaml_file in policy_dir.glob("*.yaml"):
+        try:
+            with open(yaml_file, 'r') as f:
+                rule_data = _yaml_load(f)
+            
+            if rule_data.get('name') == rule_name:
+                return yaml_file
+                
+        except Exception as e:
+            print(f"❌ Error checking rule file {yaml_file}: {e}")
+    return None
 
 def add_rule(yaml_file: str):
     """Add policy rule from YAML file"""
@@ -289,9 +462,8 @@ def add_rule(yaml_file: str):
         return
     
     try:
-        import yaml
         with open(yaml_file, 'r') as f:
-            rule_data = yaml.safe_load(f)
+            rule_data = _yaml_load(f)
         
         # Copy to policies directory
         config = create_default_config()
@@ -300,7 +472,7 @@ def add_rule(yaml_file: str):
         
         target_file = policy_dir / f"{rule_data.get('name', 'custom')}.yaml"
         with open(target_file, 'w') as f:
-            yaml.dump(rule_data, f, default_flow_style=False, indent=2)
+            _yaml_dump(rule_data, f)
         
         print(f"✅ Added rule: {rule_data.get('name', 'custom')}")
         
@@ -313,19 +485,14 @@ def remove_rule(rule_name: str):
     policy_dir = Path(config.policy_directory)
     
     # Find and remove rule file
-    for yaml_file in policy_dir.glob("*.yaml"):
+    yaml_file = _find_rule_file(policy_dir, rule_name)
+    if yaml_file:
         try:
-            import yaml
-            with open(yaml_file, 'r') as f:
-                rule_data = yaml.safe_load(f)
-            
-            if rule_data.get('name') == rule_name:
-                yaml_file.unlink()
-                print(f"✅ Removed rule: {rule_name}")
-                return
-                
+            yaml_file.unlink()
+            print(f"✅ Removed rule: {rule_name}")
+            return
         except Exception as e:
-            print(f"❌ Error checking rule file {yaml_file}: {e}")
+            print(f"❌ Error removing rule file {yaml_file}: {e}")
     
     print(f"❌ Rule not found: {rule_name}")
 
@@ -334,19 +501,18 @@ def enable_rule(rule_name: str):
     config = create_default_config()
     policy_dir = Path(config.policy_directory)
     
-    for yaml_file in policy_dir.glob("*.yaml"):
+    yaml_file = _find_rule_file(policy_dir, rule_name)
+    if yaml_file:
         try:
-            import yaml
             with open(yaml_file, 'r') as f:
-                rule_data = yaml.safe_load(f)
+                rule_data = _yaml_load(f)
+            
+            rule_data['enabled'] = True
+            with open(yaml_file, 'w') as f:
+                _yaml_dump(rule_data, f)
+            print(f"✅ Enabled rule: {rule_name}")
+            return
             
-            if rule_data.get('name') == rule_name:
-                rule_data['enabled'] = True
-                with open(yaml_file, 'w') as f:
-                    yaml.dump(rule_data, f, default_flow_style=False, indent=2)
-                print(f"✅ Enabled rule: {rule_name}")
-                return
-                
         except Exception as e:
             print(f"❌ Error updating rule file {yaml_file}: {e}")
     
@@ -357,19 +523,18 @@ def disable_rule(rule_name: str):
     config = create_default_config()
     policy_dir = Path(config.policy_directory)
     
-    for yaml_file in policy_dir.glob("*.yaml"):
+    yaml_file = _find_rule_file(policy_dir, rule_name)
+    if yaml_file:
         try:
-            import yaml
             with open(yaml_file, 'r') as f:
-                rule_data = yaml.safe_load(f)
+                rule_data = _yaml_load(f)
+            
+            rule_data['enabled'] = False
+            with open(yaml_file, 'w') as f:
+                _yaml_dump(rule_data, f)
+            print(f"✅ Disabled rule: {rule_name}")
+            return
             
-            if rule_data.get('name') == rule_name:
-                rule_data['enabled'] = False
-                with open(yaml_file, 'w') as f:
-                    yaml.dump(rule_data, f, default_flow_style=False, indent=2)
-                print(f"✅ Disabled rule: {rule_name}")
-                return
-                
         except Exception as e:
             print(f"❌ Error updating rule file {yaml_file}: {e}")
     
@@ -405,63 +570,62 @@ def show_info(args):
     print("📋 Policy Engine Information")
     print("=" * 60)
     
+    from engine import PolicyEngine
     config = create_default_config()
     engine = PolicyEngine(config)
     
-    print(f"Policy Directory: {config.policy_directory}")
-    print(f"Total Rules Loaded: {len(engine.rules)}")
-    print(f"Enabled Rules: {len([r for r in engine.rules if r.enabled])}")
-    
-    print(f"\nRule Types:")
-    rule_types = {}
+    # Tally everything in one pass over the rules
+    enabled_rules = 0
+    rule_types = Counter()
+    severity_levels = Counter()
     for rule in engine.rules:
-        rule_types[rule.rule_type.value] = rule_types.get(rule.rule_type.value, 0) + 1
-    
-    for rule_type, count in rule_types.items():
-        print(f"  - {rule_type}: {count}")
-    
-    print(f"\nSeverity Levels:")
-    severity_levels = {}
-    for rule in engine.rules:
-        severity_levels[rule.severity.value] = severity_levels.get(rule.severity.value, 0) + 1
-    
-    for severity, count in severity_levels.items():
-        print(f"  - {severity}: {count}")
+        enabled_rules += rule.enabled
+        rule_types[rule.rule_type.value] += 1
+        severity_levels[rule.severity.value] += 1
+    
+    lines = [
+        f"Policy Directory: {config.policy_directory}",
+        f"Total Rules Loaded: {len(engine.rules)}",
+        f"Enabled Rules: {enabled_rules}",
+        f"\nRule Types:",
+    ]
+    lines.extend(f"  - {rule_type}: {count}" for rule_type, count in rule_types.items())
+    lines.append(f"\nSeverity Levels:")
+    lines.extend(f"  - {severity}: {count}" for severity, count in severity_levels.items())
     
     if args.detailed:
-        print(f"\n📋 Detailed Rule Information:")
+        lines.append(f"\n📋 Detailed Rule Information:")
         for rule in engine.rules:
-            print(f"\n🔍 {rule.name}")
-            print(f"   Type: {rule.rule_type.value}")
-            print(f"   Severity: {rule.severity.value}")
-            print(f"   Enabled: {rule.enabled}")
-            print(f"   Description: {rule.description}")
-            print(f"   Conditions: {len(rule.conditions)}")
-            for condition in rule.conditions:
-                print(f"     - {condition.type.value}: {condition.description}")
-            print(f"   Actions: {len(rule.actions)}")
-            for action in rule.actions:
-                print(f"     - {action.type.value}: {action.description}")
+            lines.extend(format_rule(rule, detailed=True))
+    
+    sys.stdout.write("\n".join(lines) + "\n")
 
 def save_report(report, output_file: str, format_type: str):
     """Save report in specified format"""
     if format_type == 'json':
-        with open(output_file, 'w') as f:
-            json.dump(report.dict(), f, indent=2, default=str)
+        with open(output_file, 'wb') as f:
+            f.write(report.model_dump_json(indent=2).encode())
     
     elif format_type == 'html':
-        html_content = generate_html_report(report)
         with open(output_file, 'w') as f:
-            f.write(html_content)
+            f.writelines(iter_html_report(report))
     
     elif format_type == 'markdown':
-        md_content = generate_markdown_report(report)
         with open(output_file, 'w') as f:
-            f.write(md_content)
+            f.writelines(iter_markdown_report(report))
+
+def iter_violations(report):
+    """Yield every violation in the report, in evaluation order"""
+    for evaluation in report.evaluations:
+        yield from evaluation.violations
 
 def generate_html_report(report) -> str:
     """Generate HTML report"""
-    html = f"""
+    return "".join(iter_html_report(report))
+
+def iter_html_report(report):
+    """Yield the HTML report in chunks, one per violation between header and footer"""
+    yield f"""
 <!DOCTYPE html>
 <html>
 <head>
@@ -505,11 +669,9 @@ def generate_html_report(report) -> str:
         <h2>🚨 Policy Violations</h2>
     """
     
-    for evaluation in report.evaluations:
-        if evaluation.violations:
-            for violation in evaluation.violations:
-                severity_class = violation.severity.value
-                html += f"""
+    for violation in iter_violations(report):
+        severity_class = violation.severity.value
+        yield f"""
         <div class="violation {severity_class}">
             <h3>❌ {violation.rule_name}</h3>
             <p><strong>Endpoint:</strong> {violation.method} {violation.endpoint}</p>
@@ -519,17 +681,19 @@ def generate_html_report(report) -> str:
         </div>
                 """
     
-    html += """
+    yield """
     </div>
 </body>
 </html>
     """
-    
-    return html
 
 def generate_markdown_report(report) -> str:
     """Generate Markdown report"""
-    md = f"""# 🔍 Policy Report
+    return "".join(iter_markdown_report(report))
+
+def iter_markdown_report(report):
+    """Yield the Markdown report in chunks, one per violation after the summary"""
+    yield f"""# 🔍 Policy Report
 
 **Report:** {report.report_name}  
 **Target:** {report.target_api}  
@@ -546,10 +710,8 @@ def generate_markdown_report(report) -> str:
 
 """
     
-    for evaluation in report.evaluations:
-        if evaluation.violations:
-            for violation in evaluation.violations:
-                md += f"""### ❌ {violation.rule_name}
+    for violation in iter_violations(report):
+        yield f"""### ❌ {violation.rule_name}
 
 - **Endpoint:** {violation.method} {violation.endpoint}
 - **Severity:** {violation.severity.value}
@@ -557,8 +719,6 @@ def generate_markdown_report(report) -> str:
 - **Actions:** {', '.join(violation.actions_taken)}
 
 """
-    
-    return md
 
 def print_summary(report):
     """Print evaluation summary"""
@@ -582,5 +742,14 @@ def print_summary(report):
     else:
         print(f"\n✅ No policy violations found!")
 
+# Subcommand handlers, keyed like BUILDERS
+_DISPATCH = {
+    'evaluate': run_evaluation,
+    'test': run_test,
+    'rules': manage_rules,
+    'report': generate_report,
+    'info': show_info,
+}
+
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -1,23 +1,371 @@
 import yaml
 import json
+import mmap
+import os
 import re
-from typing import List, Dict, Any, Optional, Tuple
+import sys
+from collections import Counter, deque
+from typing import List, Dict, Any, Callable, Deque, Iterable, Optional, Tuple
+from dataclasses import dataclass, field
 from datetime import datetime
+from functools import cached_property
 from pathlib import Path
 
+# libyaml-backed loader/dumper when PyYAML was built with it
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+YAML_DUMPER = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+try:
+    import ahocorasick
+except ImportError:  # optional, only speeds up many-literal body_contains policies
+    ahocorasick = None
+
 from models import (
     PolicyRule, PolicyCondition, PolicyAction, PolicyViolation,
-    PolicyEvaluation, PolicyReport, PolicyConfig, PolicySet,
-    RuleType, ConditionType, OperatorType, ActionType, SeverityLevel
+    PolicyEvaluation, PolicyReport, StreamingPolicyReport, PolicyConfig, PolicySet,
+    RuleType, ConditionType, OperatorType, ActionType, SeverityLevel,
+    REGEX_OPERATORS
 )
 
+# Policy files at least this large are mapped rather than read into memory
+MMAP_MIN_SIZE = 4096
+
+# Severity order; the enum values themselves do not sort meaningfully
+SEVERITY_RANK = {
+    SeverityLevel.LOW: 0,
+    SeverityLevel.MEDIUM: 1,
+    SeverityLevel.HIGH: 2,
+    SeverityLevel.CRITICAL: 3,
+}
+
+# Rough relative cost of each condition type; cheap checks run first so
+# AND/OR logic can short-circuit before the body scans
+CONDITION_COST = {
+    ConditionType.METHOD_MATCH: 0,
+    ConditionType.ENDPOINT_MATCH: 1,
+    ConditionType.HEADER_PRESENT: 2,
+    ConditionType.AUTH_REQUIRED: 2,
+    ConditionType.RESPONSE_STATUS: 3,
+    ConditionType.HEADER_VALUE: 4,
+    ConditionType.BODY_CONTAINS: 6,
+    ConditionType.SENSITIVE_DATA: 7,
+    ConditionType.CUSTOM_REGEX: 8,
+}
+
+def condition_cost(condition: PolicyCondition) -> int:
+    """Estimated cost of evaluating a condition"""
+    if condition.type == ConditionType.ENDPOINT_MATCH and condition.operator in REGEX_OPERATORS:
+        return 5
+    return CONDITION_COST.get(condition.type, 8)
+
+@dataclass(slots=True, frozen=True)
+class ConditionPlan:
+    """A condition with its evaluator and matching state resolved, for the evaluation loop"""
+    # Plain enum values: comparing with a str literal is far cheaper than an Enum member lookup
+    type: str
+    field: str
+    field_lower: str
+    operator: str
+    value: Any
+    evaluate: Callable
+    compiled: Optional[re.Pattern] = None
+    value_lower: Optional[str] = None
+
+@dataclass(slots=True)
+class RulePlan:
+    """A rule's conditions in evaluation order, cheapest first, and how they combine"""
+    rule: PolicyRule
+    is_or: bool
+    conditions: List[ConditionPlan]
+    severity_rank: int
+    blocks: bool
+    # Generated by fuse_conditions(); called as matches(engine, ctx)
+    matches: Optional[Callable] = None
+    # Only endpoint the rule can match, when it requires an exact endpoint
+    endpoint: Optional[str] = None
+
+# Most distinct endpoints whose candidate rule lists are kept per evaluation pass
+ENDPOINT_CANDIDATES_MAX = 4096
+
+@dataclass(slots=True)
+class ActiveRules:
+    """Plans of the enabled rules for an evaluation pass, narrowed per endpoint on demand"""
+    enabled: List[RulePlan]
+    bodyless: List[RulePlan]
+    # (endpoint, has_body) -> the rules that can match it, in rule order
+    by_endpoint: Dict[Tuple[str, bool], List[RulePlan]] = field(default_factory=dict)
+    
+    def candidates(self, endpoint: str, has_body: bool) -> List[RulePlan]:
+        """Rules worth evaluating for an exchange; rules pinned to another endpoint are left out"""
+        key = (endpoint, has_body)
+        rules = self.by_endpoint.get(key)
+        if rules is None:
+            source = self.enabled if has_body else self.bodyless
+            rules = [plan for plan in source if plan.endpoint is None or plan.endpoint == endpoint]
+            if len(self.by_endpoint) < ENDPOINT_CANDIDATES_MAX:
+                self.by_endpoint[key] = rules
+        return rules
+
+# Operators of the conditions inline_condition() can specialize, as expression templates over `ctx` and `_v`
+INLINE_TEMPLATES = {
+    ("method_match", "equals"): "ctx.method.upper() == _v",
+    ("endpoint_match", "equals"): "ctx.endpoint == _v",
+    ("endpoint_match", "contains"): "_v in ctx.endpoint",
+    ("endpoint_match", "regex_match"): "_v.search(ctx.endpoint) is not None",
+    ("header_present", "equals"): "ctx.has_header(_v)",
+    ("header_present", "not_equals"): "not ctx.has_header(_v)",
+    ("response_status", "equals"): "ctx.response_status == _v",
+    ("response_status", "greater_than"): "ctx.response_status > _v",
+    ("response_status", "less_than"): "ctx.response_status < _v",
+}
+
+# Condition types whose evaluators return False for any operator without a template
+INLINE_TYPES = {"method_match", "endpoint_match", "header_present", "response_status"}
+
+def inline_condition(condition: ConditionPlan) -> Optional[Tuple[str, Any]]:
+    """Expression and bound value equivalent to a condition's evaluator, or None to call the evaluator"""
+    if condition.type not in INLINE_TYPES:
+        return None
+    template = INLINE_TEMPLATES.get((condition.type, condition.operator))
+    if template is None:
+        return "False", None
+    
+    if condition.type == "method_match":
+        if not isinstance(condition.value, str):
+            return None
+        return template, condition.value.upper()
+    if condition.type == "header_present":
+        return template, condition.field_lower
+    if condition.operator == "regex_match":
+        if condition.compiled is None:
+            return None
+        return template, condition.compiled
+    return template, condition.value
+
+def shared_result(engine: "PolicyEngine", condition: ConditionPlan, ctx: "EvaluationContext") -> bool:
+    """A condition's result for this exchange, evaluated once however many rules share the condition"""
+    results = ctx.condition_results
+    key = id(condition)
+    if key not in results:
+        results[key] = condition.evaluate(engine, condition, ctx)
+    return results[key]
+
+def fuse_conditions(plan: RulePlan) -> Callable:
+    """Generate one function testing all of a rule's conditions, inlining the simple ones"""
+    namespace = {}
+    params = ["engine", "ctx"]
+    calls = []
+    for i, condition in enumerate(plan.conditions):
+        inlined = inline_condition(condition)
+        if inlined is not None:
+            template, value = inlined
+            namespace[f"_v{i}"] = value
+            params.append(f"_v{i}=_v{i}")
+            calls.append(f"({template.replace('_v', f'_v{i}')})")
+            continue
+        
+        namespace[f"_f{i}"] = shared_result
+        namespace[f"_c{i}"] = condition
+        params += [f"_f{i}=_f{i}", f"_c{i}=_c{i}"]
+        calls.append(f"_f{i}(engine, _c{i}, ctx)")
+    
+    if calls:
+        expression = f"bool({(' or ' if plan.is_or else ' and ').join(calls)})"
+    else:
+        # Same results as any()/all() over no conditions
+        expression = "False" if plan.is_or else "True"
+    
+    source = f"def matches({', '.join(params)}):\n    return {expression}\n"
+    exec(compile(source, f"<rule {plan.rule.name!r}>", "exec"), namespace)
+    return namespace["matches"]
+
+class ViolationColumns:
+    """Report fields of retained violations as parallel columns, so summaries avoid walking evaluations"""
+    __slots__ = ("severities", "rule_names", "endpoints", "counts", "severity_counts")
+    
+    def __init__(self):
+        self.severities: Deque[SeverityLevel] = deque()
+        # Violations per severity, indexed by SEVERITY_RANK
+        self.severity_counts: List[int] = [0] * len(SEVERITY_RANK)
+        self.rule_names: Deque[str] = deque()
+        self.endpoints: Deque[str] = deque()
+        # Violations per evaluation, in evaluation order
+        self.counts: Deque[int] = deque()
+    
+    def add(self, evaluation: PolicyEvaluation):
+        """Append an evaluation's violations"""
+        for violation in evaluation.violations:
+            self.severities.append(violation.severity)
+            self.severity_counts[SEVERITY_RANK[violation.severity]] += 1
+            self.rule_names.append(violation.rule_name)
+            self.endpoints.append(violation.endpoint)
+        self.counts.append(len(evaluation.violations))
+    
+    def drop_oldest(self):
+        """Forget the violations of the oldest evaluation"""
+        for _ in range(self.counts.popleft()):
+            self.severity_counts[SEVERITY_RANK[self.severities.popleft()]] -= 1
+            self.rule_names.popleft()
+            self.endpoints.popleft()
+    
+    def clear(self):
+        """Forget everything"""
+        for column in (self.severities, self.rule_names, self.endpoints, self.counts):
+            column.clear()
+        self.severity_counts = [0] * len(SEVERITY_RANK)
+
+@dataclass(slots=True)
+class SummaryAccumulator:
+    """Report totals kept up to date per evaluation, for reports over evaluations no longer in memory"""
+    requests: int = 0
+    requests_with_violations: int = 0
+    # Violations per severity, indexed by SEVERITY_RANK
+    severity_counts: List[int] = field(default_factory=lambda: [0] * len(SEVERITY_RANK))
+    violations_by_rule: Counter = field(default_factory=Counter)
+    violations_by_endpoint: Counter = field(default_factory=Counter)
+    
+    def add(self, evaluation: PolicyEvaluation):
+        """Count an evaluation and its violations"""
+        self.requests += 1
+        if evaluation.violations:
+            self.requests_with_violations += 1
+        for violation in evaluation.violations:
+            self.severity_counts[SEVERITY_RANK[violation.severity]] += 1
+            self.violations_by_rule[violation.rule_name] += 1
+            self.violations_by_endpoint[violation.endpoint] += 1
+
+# Request headers left out of violation evidence
+REDACTED_HEADERS = ('authorization', 'cookie')
+
+class EvaluationContext:
+    """One request/response under evaluation; serialized forms are built on first use"""
+    
+    def __init__(self, endpoint: str, method: str,
+                 request_headers: Dict[str, str], request_body: Optional[Dict[str, Any]],
+                 response_status: int, response_headers: Dict[str, str],
+                 response_body: Optional[Dict[str, Any]]):
+        # Interned so every evaluation and violation of an endpoint shares one key object
+        self.endpoint = sys.intern(endpoint) if type(endpoint) is str else endpoint
+        self.method = sys.intern(method) if type(method) is str else method
+        self.request_headers = request_headers
+        self.request_body = request_body
+        self.response_status = response_status
+        self.response_headers = response_headers
+        self.response_body = response_body
+        self.literal_hits = None
+        # Results of evaluated conditions by plan id, see shared_result()
+        self.condition_results: Dict[int, bool] = {}
+        # Shared by the evaluation and every violation it records
+        self.timestamp = datetime.utcnow()
+    
+    @property
+    def has_body(self) -> bool:
+        """Whether body conditions have any text to look at"""
+        return bool(self.request_body or self.response_body)
+    
+    @cached_property
+    def request_headers_ci(self) -> Dict[str, str]:
+        """Request headers keyed by lowercased name"""
+        return {name.lower(): value for name, value in self.request_headers.items()}
+    
+    @cached_property
+    def response_headers_ci(self) -> Dict[str, str]:
+        """Response headers keyed by lowercased name"""
+        return {name.lower(): value for name, value in self.response_headers.items()}
+    
+    def has_header(self, name: str) -> bool:
+        """Whether either side sent the header; name must be lowercase"""
+        return name in self.response_headers_ci or name in self.request_headers_ci
+    
+    def get_header(self, name: str) -> Optional[str]:
+        """Header value by lowercase name, preferring the response like a merged view would"""
+        if name in self.response_headers_ci:
+            return self.response_headers_ci[name]
+        return self.request_headers_ci.get(name)
+    
+    @cached_property
+    def timestamp_text(self) -> str:
+        """Evaluation time as recorded in violation evidence"""
+        return self.timestamp.isoformat()
+    
+    @cached_property
+    def evidence_headers(self) -> Dict[str, str]:
+        """Request headers minus credentials, as recorded in violation evidence"""
+        return {k: v for k, v in self.request_headers.items() if k.lower() not in REDACTED_HEADERS}
+    
+    @cached_property
+    def request_json(self) -> str:
+        """Request body as JSON, or empty when there is none"""
+        return json.dumps(self.request_body) if self.request_body else ""
+    
+    @cached_property
+    def response_json(self) -> str:
+        """Response body as JSON, or empty when there is none"""
+        return json.dumps(self.response_body) if self.response_body else ""
+    
+    @cached_property
+    def body_text(self) -> str:
+        """Request and response bodies, as searched by body conditions"""
+        return " ".join(text for text in (self.request_json, self.response_json) if text)
+    
+    @cached_property
+    def body_text_lower(self) -> str:
+        """Lowercased body text for case-insensitive contains checks"""
+        return self.body_text.lower()
+    
+    @cached_property
+    def search_text(self) -> str:
+        """Everything about the exchange, as searched by custom regex conditions"""
+        return " ".join([
+            self.endpoint,
+            self.method,
+            json.dumps(self.request_headers),
+            self.request_json,
+            json.dumps(self.response_headers),
+            self.response_json
+        ])
+
 class PolicyEngine:
     """YAML-driven policy engine for API governance"""
     
+    # Email, SSN and credit card number, fused so the body is scanned once
+    _SENSITIVE_RE = re.compile("|".join(f"(?:{pattern})" for pattern in (
+        r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
+        r'\b\d{3}-\d{2}-\d{4}\b',
+        r'\b\d{4}[- ]?\d{4}[- ]?\d{4}[- ]?\d{4}\b',
+    )))
+    
+    # Request headers (lowercased) that count as credentials for auth_required conditions
+    _AUTH_HEADERS = tuple(sys.intern(header) for header in ('authorization', 'x-api-key', 'x-auth-token'))
+    
+    # Distinct body_contains literals before one Aho-Corasick pass beats repeated substring scans
+    _AUTOMATON_MIN_LITERALS = 8
+    
+    # Condition types that only look at request/response bodies
+    _BODY_CONDITION_TYPES = (ConditionType.BODY_CONTAINS, ConditionType.SENSITIVE_DATA)
+    
     def __init__(self, config: PolicyConfig):
         self.config = config
         self.rules: List[PolicyRule] = []
-        self.evaluations: List[PolicyEvaluation] = []
+        # Oldest evaluations are dropped once max_evaluations_retained is reached
+        self.evaluations: Deque[PolicyEvaluation] = deque(maxlen=config.max_evaluations_retained)
+        self._violation_columns = ViolationColumns()
+        
+        # Totals over every evaluation, and the file they are appended to, for streaming reports
+        self._summary = SummaryAccumulator() if config.evaluations_path else None
+        self._evaluation_spool = None
+        
+        # Rules that can still fire when a request and response carry no body
+        self._bodyless_rules: List[PolicyRule] = []
+        # The rule objects that index was built from, compared by identity
+        self._indexed_rules: Tuple[PolicyRule, ...] = ()
+        
+        # One-pass matcher for every body_contains literal, when there are enough of them
+        self._literal_automaton = None
+        
+        # One plan per distinct condition, so rules repeating a condition share its result
+        self._condition_plans: Dict[Tuple, ConditionPlan] = {}
+        
         self.load_policies()
     
     def load_policies(self):
@@ -31,31 +379,114 @@ class PolicyEngine:
         
         # Load all YAML files in policy directory
         for yaml_file in policy_dir.glob("*.yaml"):
-            try:
-                with open(yaml_file, 'r') as f:
-                    policy_data = yaml.safe_load(f)
-                
-                if isinstance(policy_data, dict):
-                    if 'rules' in policy_data:
-                        # Policy set format
-                        self._load_policy_set(policy_data)
-                    elif 'name' in policy_data and 'conditions' in policy_data:
-                        # Single rule format
-                        self._load_single_rule(policy_data)
-                elif isinstance(policy_data, list):
-                    # List of rules format
-                    for rule_data in policy_data:
-                        self._load_single_rule(rule_data)
-                
-                print(f"✅ Loaded policies from {yaml_file}")
-                
-            except Exception as e:
-                print(f"❌ Error loading policies from {yaml_file}: {e}")
+            self._parse_policy_file(yaml_file)
         
         # Load custom rules if specified
         if self.config.custom_rules_file and Path(self.config.custom_rules_file).exists():
             self._load_custom_rules()
     
+    def _parse_policy_file(self, yaml_file: Path) -> bool:
+        """Parse a policy YAML file into rules; returns whether it loaded cleanly"""
+        try:
+            with open(yaml_file, 'rb') as f:
+                if os.fstat(f.fileno()).st_size < MMAP_MIN_SIZE:
+                    policy_data = yaml.load(f.read(), Loader=YAML_LOADER)
+                else:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                        policy_data = yaml.load(mapped, Loader=YAML_LOADER)
+            
+            if isinstance(policy_data, dict):
+                if 'rules' in policy_data:
+                    # Policy set format
+                    self._load_policy_set(policy_data)
+                elif 'name' in policy_data and 'conditions' in policy_data:
+                    # Single rule format
+                    self._load_single_rule(policy_data)
+            elif isinstance(policy_data, list):
+                # List of rules format
+                for rule_data in policy_data:
+                    self._load_single_rule(rule_data)
+            
+            print(f"✅ Loaded policies from {yaml_file}")
+            return True
+            
+        except Exception as e:
+            print(f"❌ Error loading policies from {yaml_file}: {e}")
+            return False
+    
+    def precompile(self, rules: Optional[List[PolicyRule]] = None) -> int:
+        """Build evaluation plans up front; returns the number of regex patterns they use"""
+        compiled = 0
+        for rule in self.rules if rules is None else rules:
+            plan = self._prepare_rule(rule)
+            compiled += sum(1 for condition in plan.conditions if condition.compiled is not None)
+        
+        return compiled
+    
+    def _prepare_rule(self, rule: PolicyRule) -> RulePlan:
+        """Build and attach the evaluation plan of a rule"""
+        plan = RulePlan(
+            rule=rule,
+            is_or=rule.condition_logic.upper() == "OR",
+            conditions=[],
+            severity_rank=SEVERITY_RANK[rule.severity],
+            blocks=any(action.type == ActionType.BLOCK for action in rule.actions)
+        )
+        for condition in sorted(rule.conditions, key=condition_cost):
+            plan.conditions.append(self._prepare_condition(condition))
+        plan.matches = fuse_conditions(plan)
+        if not plan.is_or:
+            for condition in plan.conditions:
+                if (condition.type == "endpoint_match" and condition.operator == "equals"
+                        and isinstance(condition.value, str)):
+                    plan.endpoint = condition.value
+                    break
+        rule._plan = plan
+        return plan
+    
+    def _prepare_condition(self, condition: PolicyCondition) -> ConditionPlan:
+        """The plan of a condition, shared with every identical condition already prepared"""
+        key = (condition.type, condition.field, condition.operator, type(condition.value), condition.value)
+        try:
+            plan = self._condition_plans.get(key)
+        except TypeError:
+            # Unhashable values (lists, mappings) get a plan of their own
+            return self._build_condition_plan(condition)
+        if plan is None:
+            plan = self._condition_plans[key] = self._build_condition_plan(condition)
+        return plan
+    
+    def _build_condition_plan(self, condition: PolicyCondition) -> ConditionPlan:
+        """Resolve the evaluator and compiled pattern or lowercased literal a condition matches with"""
+        # Interned so comparisons and dict lookups against rule strings can short-cut on identity
+        value = sys.intern(condition.value) if isinstance(condition.value, str) else condition.value
+        value_lower = None
+        if condition.operator == OperatorType.CONTAINS and isinstance(value, str):
+            value_lower = sys.intern(value.lower())
+        return ConditionPlan(
+            type=condition.type.value,
+            field=sys.intern(condition.field),
+            field_lower=sys.intern(condition.field.lower()),
+            operator=condition.operator.value,
+            value=value,
+            evaluate=self._condition_evaluator(condition),
+            compiled=condition.compiled,
+            value_lower=value_lower
+        )
+    
+    def _condition_evaluator(self, condition: PolicyCondition) -> Callable:
+        """Evaluator function for a condition's type and operator"""
+        evaluator = self._CONDITION_EVALUATORS.get((condition.type, condition.operator))
+        if evaluator is None:
+            evaluator = self._TYPE_EVALUATORS.get(condition.type, PolicyEngine._evaluate_unsupported)
+        return evaluator
+    
+    def _regex_search(self, condition: ConditionPlan, text: str, flags: int = 0):
+        """Search text with the condition's precompiled pattern when it has one"""
+        if condition.compiled is not None:
+            return condition.compiled.search(text)
+        return re.search(condition.value, text, flags)
+    
     def _create_default_policies(self):
         """Create default policy directory and sample policies"""
         policy_dir = Path(self.config.policy_directory)
@@ -67,7 +498,7 @@ class PolicyEngine:
         for policy_name, policy_content in default_policies.items():
             policy_file = policy_dir / f"{policy_name}.yaml"
             with open(policy_file, 'w') as f:
-                yaml.dump(policy_content, f, default_flow_style=False, indent=2)
+                yaml.dump(policy_content, f, Dumper=YAML_DUMPER, default_flow_style=False, indent=2)
         
         print(f"✅ Created default policies in {policy_dir}")
         self.load_policies()
@@ -267,6 +698,7 @@ class PolicyEngine:
                 actions=actions,
                 tags=rule_data.get('tags', [])
             )
+            self._prepare_rule(rule)
             
             self.rules.append(rule)
             
@@ -277,7 +709,7 @@ class PolicyEngine:
         """Load custom rules from specified file"""
         try:
             with open(self.config.custom_rules_file, 'r') as f:
-                custom_rules = yaml.safe_load(f)
+                custom_rules = yaml.load(f, Loader=YAML_LOADER)
             
             if isinstance(custom_rules, list):
                 for rule_data in custom_rules:
@@ -297,320 +729,431 @@ class PolicyEngine:
                                 response_headers: Dict[str, str],
                                 response_body: Optional[Dict[str, Any]]) -> PolicyEvaluation:
         """Evaluate a request/response against all policies"""
+        # Serialized bodies and headers are shared by every rule for this request
+        ctx = EvaluationContext(endpoint, method, request_headers, request_body,
+                                response_status, response_headers, response_body)
+        return self._evaluate_context(ctx, self._active_rules())
+    
+    def evaluate_batch(self, exchanges: Iterable[Dict[str, Any]]) -> List[PolicyEvaluation]:
+        """Evaluate many request/responses, each given as evaluate_request_response keyword arguments"""
+        active_rules = self._active_rules()
+        return [self._evaluate_context(EvaluationContext(**exchange), active_rules)
+                for exchange in exchanges]
+    
+    def _active_rules(self) -> ActiveRules:
+        """Plans of the enabled rules, and of the enabled rules that can match without a body"""
+        if not self._index_is_current():
+            self._index_rules()
+        
+        enabled_rules = [self._rule_plan(rule) for rule in self.rules if rule.enabled]
+        bodyless_rules = [rule._plan for rule in self._bodyless_rules if rule.enabled]
+        return ActiveRules(enabled_rules, bodyless_rules)
+    
+    def _index_is_current(self) -> bool:
+        """Whether self.rules still holds exactly the rule objects the index was built from"""
+        indexed = self._indexed_rules
+        return (len(indexed) == len(self.rules)
+                and all(a is b for a, b in zip(indexed, self.rules)))
+    
+    def _rule_plan(self, rule: PolicyRule) -> RulePlan:
+        """A rule's evaluation plan, built now if the rule was added without one"""
+        if rule._plan is None:
+            return self._prepare_rule(rule)
+        return rule._plan
+    
+    def _evaluate_context(self, ctx: EvaluationContext, active_rules: ActiveRules) -> PolicyEvaluation:
+        """Evaluate one prepared request/response against the active rules"""
+        endpoint = ctx.endpoint
+        method = ctx.method
+        
+        matched = []
+        overall_severity = SeverityLevel.LOW
+        severity_rank = 0
+        blocked = False
+        
+        # Rules pinned to other endpoints, and without a body the rules that need one,
+        # cannot match; skip them outright
+        for plan in active_rules.candidates(endpoint, ctx.has_body):
+            # Check if rule conditions are met
+            if plan.matches(self, ctx):
+                matched.append(plan)
+                
+                # Overall severity and blocking are tracked as violations are found
+                if plan.severity_rank > severity_rank:
+                    severity_rank = plan.severity_rank
+                    overall_severity = plan.rule.severity
+                blocked = blocked or plan.blocks
         
         evaluation = PolicyEvaluation(
             endpoint=endpoint,
             method=method,
-            request_headers=request_headers,
-            request_body=request_body,
-            response_status=response_status,
-            response_headers=response_headers,
-            response_body=response_body
+            timestamp=ctx.timestamp,
+            rules_evaluated=len(active_rules.enabled),
+            violations_found=len(matched),
+            request_headers=ctx.request_headers,
+            request_body=ctx.request_body,
+            response_status=ctx.response_status,
+            response_headers=ctx.response_headers,
+            response_body=ctx.response_body,
+            overall_severity=overall_severity,
+            blocked=blocked
         )
         
-        violations = []
-        rules_evaluated = 0
-        
-        for rule in self.rules:
-            if not rule.enabled:
-                continue
+        for plan in matched:
+            rule = plan.rule
             
-            rules_evaluated += 1
+            # Create violation without validation: rule fields are already typed, and the
+            # exchange data is the evaluation's validated copy, shared by all its violations
+            violation = PolicyViolation.model_construct(
+                rule_id=rule.id or rule.name,
+                rule_name=rule.name,
+                endpoint=evaluation.endpoint,
+                method=evaluation.method,
+                severity=rule.severity,
+                description=rule.description,
+                timestamp=ctx.timestamp,
+                evidence=self._collect_violation_evidence(rule, ctx) if self.config.include_evidence else {},
+                request_headers=evaluation.request_headers,
+                request_body=evaluation.request_body,
+                response_status=evaluation.response_status,
+                response_headers=evaluation.response_headers,
+                response_body=evaluation.response_body,
+                actions_taken=[action.type.value for action in rule.actions]
+            )
             
-            # Check if rule conditions are met
-            if self._evaluate_rule_conditions(rule, endpoint, method, request_headers, 
-                                            request_body, response_status, response_headers, response_body):
-                
-                # Create violation
-                violation = PolicyViolation(
-                    rule_id=rule.id or rule.name,
-                    rule_name=rule.name,
-                    endpoint=endpoint,
-                    method=method,
-                    severity=rule.severity,
-                    description=rule.description,
-                    evidence=self._collect_violation_evidence(rule, endpoint, method, 
-                                                           request_headers, request_body, 
-                                                           response_status, response_headers, response_body),
-                    request_headers=request_headers,
-                    request_body=request_body,
-                    response_status=response_status,
-                    response_headers=response_headers,
-                    response_body=response_body,
-                    actions_taken=[action.type.value for action in rule.actions]
-                )
-                
-                violations.append(violation)
-                
-                # Execute actions
-                self._execute_actions(rule.actions, violation)
-        
-        # Update evaluation
-        evaluation.rules_evaluated = rules_evaluated
-        evaluation.violations_found = len(violations)
-        evaluation.violations = violations
-        
-        # Determine overall severity
-        if violations:
-            max_severity = max(violation.severity for violation in violations)
-            evaluation.overall_severity = max_severity
-            evaluation.blocked = any(action.type == ActionType.BLOCK for violation in violations 
-                                   for action in violations[0].actions_taken)
-        else:
-            evaluation.overall_severity = SeverityLevel.LOW
+            evaluation.violations.append(violation)
+            
+            # Execute actions
+            self._execute_actions([action.type for action in rule.actions], violation)
         
-        self.evaluations.append(evaluation)
+        self._retain(evaluation)
         return evaluation
     
-    def _evaluate_rule_conditions(self, rule: PolicyRule, endpoint: str, method: str,
-                                 request_headers: Dict[str, str], request_body: Optional[Dict[str, Any]],
-                                 response_status: int, response_headers: Dict[str, str],
-                                 response_body: Optional[Dict[str, Any]]) -> bool:
-        """Evaluate if a rule's conditions are met"""
+    def _index_rules(self):
+        """Work out which rules can match an exchange without bodies, and rebuild the literal automaton"""
+        self._literal_automaton = self._build_literal_automaton()
+        no_body = EvaluationContext("", "", {}, None, 0, {}, None)
         
-        condition_results = []
+        def needs_body(condition: ConditionPlan) -> bool:
+            # A body condition that is false on empty text can only match with a body
+            if condition.type not in self._BODY_CONDITION_TYPES:
+                return False
+            try:
+                return not self._evaluate_condition(condition, no_body)
+            except Exception:
+                return False
         
-        for condition in rule.conditions:
-            result = self._evaluate_condition(condition, endpoint, method, request_headers,
-                                           request_body, response_status, response_headers, response_body)
-            condition_results.append(result)
+        self._bodyless_rules = []
+        for rule in self.rules:
+            plan = self._rule_plan(rule)
+            gated = [needs_body(condition) for condition in plan.conditions]
+            if plan.is_or:
+                skippable = bool(gated) and all(gated)
+            else:
+                skippable = any(gated)
+            if not skippable:
+                self._bodyless_rules.append(rule)
         
-        # Apply condition logic
-        if rule.condition_logic.upper() == "AND":
-            return all(condition_results)
-        elif rule.condition_logic.upper() == "OR":
-            return any(condition_results)
-        else:
-            return all(condition_results)  # Default to AND
+        self._indexed_rules = tuple(self.rules)
     
-    def _evaluate_condition(self, condition: PolicyCondition, endpoint: str, method: str,
-                           request_headers: Dict[str, str], request_body: Optional[Dict[str, Any]],
-                           response_status: int, response_headers: Dict[str, str],
-                           response_body: Optional[Dict[str, Any]]) -> bool:
-        """Evaluate a single condition"""
-        
-        if condition.type == ConditionType.ENDPOINT_MATCH:
-            return self._evaluate_endpoint_match(condition, endpoint)
-        
-        elif condition.type == ConditionType.METHOD_MATCH:
-            return self._evaluate_method_match(condition, method)
-        
-        elif condition.type == ConditionType.HEADER_PRESENT:
-            return self._evaluate_header_present(condition, request_headers, response_headers)
-        
-        elif condition.type == ConditionType.HEADER_VALUE:
-            return self._evaluate_header_value(condition, request_headers, response_headers)
-        
-        elif condition.type == ConditionType.BODY_CONTAINS:
-            return self._evaluate_body_contains(condition, request_body, response_body)
-        
-        elif condition.type == ConditionType.RESPONSE_STATUS:
-            return self._evaluate_response_status(condition, response_status)
-        
-        elif condition.type == ConditionType.SENSITIVE_DATA:
-            return self._evaluate_sensitive_data(condition, request_body, response_body)
-        
-        elif condition.type == ConditionType.AUTH_REQUIRED:
-            return self._evaluate_auth_required(condition, request_headers)
+    def _build_literal_automaton(self):
+        """Aho-Corasick automaton over all body_contains literals, or None to scan for each one"""
+        if ahocorasick is None:
+            return None
         
-        elif condition.type == ConditionType.CUSTOM_REGEX:
-            return self._evaluate_custom_regex(condition, endpoint, method, request_headers, 
-                                             request_body, response_headers, response_body)
+        literals = {condition.value_lower
+                    for rule in self.rules
+                    for condition in self._rule_plan(rule).conditions
+                    if condition.type == ConditionType.BODY_CONTAINS and condition.value_lower}
+        if len(literals) < self._AUTOMATON_MIN_LITERALS:
+            return None
         
-        return False
+        automaton = ahocorasick.Automaton()
+        for literal in literals:
+            automaton.add_word(literal, literal)
+        automaton.make_automaton()
+        return automaton
     
-    def _evaluate_endpoint_match(self, condition: PolicyCondition, endpoint: str) -> bool:
-        """Evaluate endpoint matching condition"""
-        if condition.operator == OperatorType.REGEX_MATCH:
-            return bool(re.search(condition.value, endpoint))
-        elif condition.operator == OperatorType.EQUALS:
-            return endpoint == condition.value
-        elif condition.operator == OperatorType.CONTAINS:
-            return condition.value in endpoint
-        return False
+    def _literal_hits(self, ctx: EvaluationContext) -> set:
+        """The body_contains literals found in this exchange's body, from a single automaton pass"""
+        if ctx.literal_hits is None:
+            ctx.literal_hits = {literal for _, literal in self._literal_automaton.iter(ctx.body_text_lower)}
+        return ctx.literal_hits
     
-    def _evaluate_method_match(self, condition: PolicyCondition, method: str) -> bool:
-        """Evaluate HTTP method matching condition"""
-        if condition.operator == OperatorType.EQUALS:
-            return method.upper() == condition.value.upper()
-        return False
+    def ingest(self, evaluations: List[PolicyEvaluation]):
+        """Add evaluations produced by another engine, e.g. in a worker process, running their actions here"""
+        for evaluation in evaluations:
+            for violation in evaluation.violations:
+                self._execute_actions(map(ActionType, violation.actions_taken), violation)
+            self._retain(evaluation)
     
-    def _evaluate_header_present(self, condition: PolicyCondition, 
-                                request_headers: Dict[str, str], 
-                                response_headers: Dict[str, str]) -> bool:
-        """Evaluate header presence condition"""
-        header_name = condition.field
-        headers = {**request_headers, **response_headers}
-        
-        if condition.operator == OperatorType.EQUALS:
-            return header_name in headers
-        elif condition.operator == OperatorType.NOT_EQUALS:
-            return header_name not in headers
-        return False
+    def clear_evaluations(self):
+        """Forget all retained evaluations"""
+        self.evaluations.clear()
+        self._violation_columns.clear()
+        if self._summary is not None:
+            # The next evaluation starts the streamed file afresh
+            self._summary = SummaryAccumulator()
+            self._close_spool()
     
-    def _evaluate_header_value(self, condition: PolicyCondition,
-                              request_headers: Dict[str, str],
-                              response_headers: Dict[str, str]) -> bool:
-        """Evaluate header value condition"""
-        header_name = condition.field
-        headers = {**request_headers, **response_headers}
-        
-        if header_name not in headers:
+    def close(self):
+        """Close the evaluations file once evaluating is done; reports can still read it"""
+        self._close_spool()
+    
+    def __enter__(self) -> "PolicyEngine":
+        """Use the engine as a context manager that closes it on exit"""
+        return self
+    
+    def __exit__(self, *exc_info):
+        """Close the engine"""
+        self.close()
+    
+    def _retain(self, evaluation: PolicyEvaluation):
+        """Keep an evaluation for reports, keeping the violation columns in step"""
+        if self._summary is not None:
+            self._summary.add(evaluation)
+            self._spool(evaluation)
+        if self.evaluations.maxlen == 0:
+            return
+        if len(self.evaluations) == self.evaluations.maxlen:
+            self._violation_columns.drop_oldest()
+        self.evaluations.append(evaluation)
+        self._violation_columns.add(evaluation)
+    
+    def _spool(self, evaluation: PolicyEvaluation):
+        """Append an evaluation to the evaluations file as one JSON line"""
+        if self._evaluation_spool is None:
+            self._evaluation_spool = open(self.config.evaluations_path, 'wb')
+        self._evaluation_spool.write(evaluation.__pydantic_serializer__.to_json(evaluation) + b"\n")
+    
+    def _close_spool(self):
+        """Close the evaluations file, if one is open"""
+        if self._evaluation_spool is not None:
+            self._evaluation_spool.close()
+            self._evaluation_spool = None
+    
+    def _evaluate_condition(self, condition: ConditionPlan, ctx: EvaluationContext) -> bool:
+        """Evaluate a single condition"""
+        return condition.evaluate(self, condition, ctx)
+    
+    def _evaluate_endpoint_regex_match(self, condition: ConditionPlan, ctx: EvaluationContext) -> bool:
+        """Endpoint matches the condition's pattern"""
+        return bool(self._regex_search(condition, ctx.endpoint))
+    
+    def _evaluate_endpoint_equals(self, condition: ConditionPlan, ctx: EvaluationContext) -> bool:
+        """Endpoint is exactly the condition's value"""
+        return ctx.endpoint == condition.value
+    
+    def _evaluate_endpoint_contains(self, condition: ConditionPlan, ctx: EvaluationContext) -> bool:
+        """Endpoint contains the condition's value"""
+        return condition.value in ctx.endpoint
+    
+    def _evaluate_method_equals(self, condition: ConditionPlan, ctx: EvaluationContext) -> bool:
+        """HTTP method matches the condition's value, ignoring case"""
+        return ctx.method.upper() == condition.value.upper()
+    
+    def _evaluate_header_present(self, condition: ConditionPlan, ctx: EvaluationContext) -> bool:
+        """Header is sent on either side"""
+        return ctx.has_header(condition.field_lower)
+    
+    def _evaluate_header_absent(self, condition: ConditionPlan, ctx: EvaluationContext) -> bool:
+        """Header is sent on neither side"""
+        return not ctx.has_header(condition.field_lower)
+    
+    def _evaluate_header_equals(self, condition: ConditionPlan, ctx: EvaluationContext) -> bool:
+        """Header is sent with exactly the condition's value"""
+        if not ctx.has_header(condition.field_lower):
             return False
-        
-        header_value = headers[header_name]
-        
-        if condition.operator == OperatorType.EQUALS:
-            return header_value == condition.value
-        elif condition.operator == OperatorType.CONTAINS:
-            return condition.value in header_value
-        elif condition.operator == OperatorType.REGEX_MATCH:
-            return bool(re.search(condition.value, header_value))
-        return False
+        return ctx.get_header(condition.field_lower) == condition.value
     
-    def _evaluate_body_contains(self, condition: PolicyCondition,
-                               request_body: Optional[Dict[str, Any]],
-                               response_body: Optional[Dict[str, Any]]) -> bool:
-        """Evaluate body content condition"""
-        bodies = []
-        if request_body:
-            bodies.append(json.dumps(request_body))
-        if response_body:
-            bodies.append(json.dumps(response_body))
-        
-        body_text = " ".join(bodies)
-        
-        if condition.operator == OperatorType.CONTAINS:
-            return condition.value.lower() in body_text.lower()
-        elif condition.operator == OperatorType.REGEX_MATCH:
-            return bool(re.search(condition.value, body_text, re.IGNORECASE))
-        return False
+    def _evaluate_header_contains(self, condition: ConditionPlan, ctx: EvaluationContext) -> bool:
+        """Header is sent with a value containing the condition's value"""
+        if not ctx.has_header(condition.field_lower):
+            return False
+        return condition.value in ctx.get_header(condition.field_lower)
     
-    def _evaluate_response_status(self, condition: PolicyCondition, response_status: int) -> bool:
-        """Evaluate response status condition"""
-        if condition.operator == OperatorType.EQUALS:
-            return response_status == condition.value
-        elif condition.operator == OperatorType.GREATER_THAN:
-            return response_status > condition.value
-        elif condition.operator == OperatorType.LESS_THAN:
-            return response_status < condition.value
-        return False
+    def _evaluate_header_regex_match(self, condition: ConditionPlan, ctx: EvaluationContext) -> bool:
+        """Header is sent with a value matching the condition's pattern"""
+        if not ctx.has_header(condition.field_lower):
+            return False
+        return bool(self._regex_search(condition, ctx.get_header(condition.field_lower)))
     
-    def _evaluate_sensitive_data(self, condition: PolicyCondition,
-                                request_body: Optional[Dict[str, Any]],
-                                response_body: Optional[Dict[str, Any]]) -> bool:
+    def _evaluate_body_contains(self, condition: ConditionPlan, ctx: EvaluationContext) -> bool:
+        """Request or response body contains the condition's value, ignoring case"""
+        automaton = self._literal_automaton
+        # Literals the automaton was not built with are scanned for directly
+        if automaton is not None and condition.value_lower and condition.value_lower in automaton:
+            return condition.value_lower in self._literal_hits(ctx)
+        return condition.value_lower in ctx.body_text_lower
+    
+    def _evaluate_body_regex_match(self, condition: ConditionPlan, ctx: EvaluationContext) -> bool:
+        """Request or response body matches the condition's pattern"""
+        return bool(self._regex_search(condition, ctx.body_text, re.IGNORECASE))
+    
+    def _evaluate_status_equals(self, condition: ConditionPlan, ctx: EvaluationContext) -> bool:
+        """Response status is the condition's value"""
+        return ctx.response_status == condition.value
+    
+    def _evaluate_status_greater_than(self, condition: ConditionPlan, ctx: EvaluationContext) -> bool:
+        """Response status is above the condition's value"""
+        return ctx.response_status > condition.value
+    
+    def _evaluate_status_less_than(self, condition: ConditionPlan, ctx: EvaluationContext) -> bool:
+        """Response status is below the condition's value"""
+        return ctx.response_status < condition.value
+    
+    def _evaluate_sensitive_data(self, condition: ConditionPlan, ctx: EvaluationContext) -> bool:
         """Evaluate sensitive data condition"""
         # This would integrate with the sensitive data classifier
         # For now, use simple pattern matching
-        bodies = []
-        if request_body:
-            bodies.append(json.dumps(request_body))
-        if response_body:
-            bodies.append(json.dumps(response_body))
-        
-        body_text = " ".join(bodies)
-        
-        sensitive_patterns = [
-            r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',  # Email
-            r'\b\d{3}-\d{2}-\d{4}\b',  # SSN
-            r'\b\d{4}[- ]?\d{4}[- ]?\d{4}[- ]?\d{4}\b',  # Credit card
-        ]
-        
-        for pattern in sensitive_patterns:
-            if re.search(pattern, body_text):
-                return True
-        
-        return False
+        return self._SENSITIVE_RE.search(ctx.body_text) is not None
+    
+    def _has_auth(self, ctx: EvaluationContext) -> bool:
+        """Whether the request carries credentials"""
+        return any(header in ctx.request_headers_ci for header in self._AUTH_HEADERS)
     
-    def _evaluate_auth_required(self, condition: PolicyCondition, request_headers: Dict[str, str]) -> bool:
-        """Evaluate authentication requirement condition"""
-        auth_headers = ['Authorization', 'X-API-Key', 'X-Auth-Token']
-        
-        has_auth = any(header in request_headers for header in auth_headers)
-        
-        if condition.operator == OperatorType.EQUALS:
-            return has_auth == condition.value
-        return has_auth
-    
-    def _evaluate_custom_regex(self, condition: PolicyCondition, endpoint: str, method: str,
-                              request_headers: Dict[str, str], request_body: Optional[Dict[str, Any]],
-                              response_headers: Dict[str, str], response_body: Optional[Dict[str, Any]]) -> bool:
-        """Evaluate custom regex condition"""
-        # Combine all data for regex search
-        data_to_search = [
-            endpoint,
-            method,
-            json.dumps(request_headers),
-            json.dumps(request_body) if request_body else "",
-            json.dumps(response_headers),
-            json.dumps(response_body) if response_body else ""
-        ]
-        
-        search_text = " ".join(data_to_search)
-        
-        if condition.operator == OperatorType.REGEX_MATCH:
-            return bool(re.search(condition.value, search_text, re.IGNORECASE))
-        elif condition.operator == OperatorType.REGEX_NOT_MATCH:
-            return not bool(re.search(condition.value, search_text, re.IGNORECASE))
+    def _evaluate_auth_equals(self, condition: ConditionPlan, ctx: EvaluationContext) -> bool:
+        """Request carries credentials exactly when the condition's value is true"""
+        return self._has_auth(ctx) == condition.value
+    
+    def _evaluate_auth_present(self, condition: ConditionPlan, ctx: EvaluationContext) -> bool:
+        """Request carries credentials"""
+        return self._has_auth(ctx)
+    
+    def _evaluate_custom_regex_match(self, condition: ConditionPlan, ctx: EvaluationContext) -> bool:
+        """Anything about the exchange matches the condition's pattern"""
+        return bool(self._regex_search(condition, ctx.search_text, re.IGNORECASE))
+    
+    def _evaluate_custom_regex_not_match(self, condition: ConditionPlan, ctx: EvaluationContext) -> bool:
+        """Nothing about the exchange matches the condition's pattern"""
+        return not bool(self._regex_search(condition, ctx.search_text, re.IGNORECASE))
+    
+    def _evaluate_unsupported(self, condition: ConditionPlan, ctx: EvaluationContext) -> bool:
+        """Condition types and operators without an evaluator never match"""
         return False
     
-    def _collect_violation_evidence(self, rule: PolicyRule, endpoint: str, method: str,
-                                   request_headers: Dict[str, str], request_body: Optional[Dict[str, Any]],
-                                   response_status: int, response_headers: Dict[str, str],
-                                   response_body: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    # Evaluator per (condition type, operator), resolved once per condition so evaluation never
+    # branches on either; plain functions rather than bound methods so plans stay picklable
+    _CONDITION_EVALUATORS = {
+        (ConditionType.ENDPOINT_MATCH, OperatorType.REGEX_MATCH): _evaluate_endpoint_regex_match,
+        (ConditionType.ENDPOINT_MATCH, OperatorType.EQUALS): _evaluate_endpoint_equals,
+        (ConditionType.ENDPOINT_MATCH, OperatorType.CONTAINS): _evaluate_endpoint_contains,
+        (ConditionType.METHOD_MATCH, OperatorType.EQUALS): _evaluate_method_equals,
+        (ConditionType.HEADER_PRESENT, OperatorType.EQUALS): _evaluate_header_present,
+        (ConditionType.HEADER_PRESENT, OperatorType.NOT_EQUALS): _evaluate_header_absent,
+        (ConditionType.HEADER_VALUE, OperatorType.EQUALS): _evaluate_header_equals,
+        (ConditionType.HEADER_VALUE, OperatorType.CONTAINS): _evaluate_header_contains,
+        (ConditionType.HEADER_VALUE, OperatorType.REGEX_MATCH): _evaluate_header_regex_match,
+        (ConditionType.BODY_CONTAINS, OperatorType.CONTAINS): _evaluate_body_contains,
+        (ConditionType.BODY_CONTAINS, OperatorType.REGEX_MATCH): _evaluate_body_regex_match,
+        (ConditionType.RESPONSE_STATUS, OperatorType.EQUALS): _evaluate_status_equals,
+        (ConditionType.RESPONSE_STATUS, OperatorType.GREATER_THAN): _evaluate_status_greater_than,
+        (ConditionType.RESPONSE_STATUS, OperatorType.LESS_THAN): _evaluate_status_less_than,
+        (ConditionType.AUTH_REQUIRED, OperatorType.EQUALS): _evaluate_auth_equals,
+        (ConditionType.CUSTOM_REGEX, OperatorType.REGEX_MATCH): _evaluate_custom_regex_match,
+        (ConditionType.CUSTOM_REGEX, OperatorType.REGEX_NOT_MATCH): _evaluate_custom_regex_not_match,
+    }
+    
+    # Evaluators for any other operator of a type; types not listed never match
+    _TYPE_EVALUATORS = {
+        ConditionType.SENSITIVE_DATA: _evaluate_sensitive_data,
+        ConditionType.AUTH_REQUIRED: _evaluate_auth_present,
+    }
+    
+    def _collect_violation_evidence(self, rule: PolicyRule, ctx: EvaluationContext) -> Dict[str, Any]:
         """Collect evidence for a policy violation"""
         return {
             "rule_name": rule.name,
             "rule_description": rule.description,
-            "endpoint": endpoint,
-            "method": method,
-            "request_headers": {k: v for k, v in request_headers.items() if k.lower() not in ['authorization', 'cookie']},
-            "response_status": response_status,
-            "timestamp": datetime.utcnow().isoformat()
+            "endpoint": ctx.endpoint,
+            "method": ctx.method,
+            "request_headers": ctx.evidence_headers,
+            "response_status": ctx.response_status,
+            "timestamp": ctx.timestamp_text
         }
     
-    def _execute_actions(self, actions: List[PolicyAction], violation: PolicyViolation):
+    def _execute_actions(self, action_types: Iterable[ActionType], violation: PolicyViolation):
         """Execute policy actions"""
-        for action in actions:
-            if action.type == ActionType.LOG:
+        for action_type in action_types:
+            if action_type == ActionType.LOG:
                 print(f"🚨 POLICY VIOLATION: {violation.rule_name} - {violation.description}")
             
-            elif action.type == ActionType.ALERT:
+            elif action_type == ActionType.ALERT:
                 print(f"🚨 ALERT: {violation.rule_name} violation detected!")
                 print(f"   Endpoint: {violation.endpoint}")
                 print(f"   Severity: {violation.severity.value}")
             
-            elif action.type == ActionType.BLOCK:
+            elif action_type == ActionType.BLOCK:
                 print(f"🚫 BLOCKED: {violation.rule_name} - Request blocked due to policy violation")
     
     def generate_report(self, target_api: str) -> PolicyReport:
         """Generate comprehensive policy evaluation report"""
         
         total_requests = len(self.evaluations)
-        requests_with_violations = len([e for e in self.evaluations if e.violations_found > 0])
-        total_violations = sum(e.violations_found for e in self.evaluations)
         
-        # Violation breakdown
-        violations_by_severity = {}
-        violations_by_rule = {}
-        violations_by_endpoint = {}
+        columns = self._violation_columns
+        if len(columns.counts) != total_requests:
+            # self.evaluations was changed directly; rebuild the columns from it
+            columns = ViolationColumns()
+            for evaluation in self.evaluations:
+                columns.add(evaluation)
+            self._violation_columns = columns
         
-        for evaluation in self.evaluations:
-            for violation in evaluation.violations:
-                # By severity
-                violations_by_severity[violation.severity] = violations_by_severity.get(violation.severity, 0) + 1
-                
-                # By rule
-                violations_by_rule[violation.rule_name] = violations_by_rule.get(violation.rule_name, 0) + 1
-                
-                # By endpoint
-                violations_by_endpoint[violation.endpoint] = violations_by_endpoint.get(violation.endpoint, 0) + 1
+        requests_with_violations = len(columns.counts) - columns.counts.count(0)
+        total_violations = len(columns.severities)
+        
+        violations_by_rule = Counter(columns.rule_names)
+        violations_by_endpoint = Counter(columns.endpoints)
+        
+        return PolicyReport(
+            report_name=f"Policy Evaluation Report - {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')}",
+            target_api=target_api,
+            generated_at=datetime.utcnow(),
+            total_requests_evaluated=total_requests,
+            requests_with_violations=requests_with_violations,
+            total_violations=total_violations,
+            violations_by_rule=violations_by_rule,
+            violations_by_endpoint=violations_by_endpoint,
+            evaluations=list(self.evaluations),
+            **self._summarize_violations(columns.severity_counts, violations_by_rule)
+        )
+    
+    def generate_streaming_report(self, target_api: str) -> StreamingPolicyReport:
+        """Generate a report over every evaluation so far, leaving the details in the evaluations file"""
+        summary = self._summary
+        if summary is None:
+            raise ValueError("Streaming reports need evaluations_path set in the policy config")
+        
+        if self._evaluation_spool is not None:
+            self._evaluation_spool.flush()
+        elif not os.path.exists(self.config.evaluations_path):
+            # Nothing evaluated yet; the report still points at a readable file
+            open(self.config.evaluations_path, 'wb').close()
+        
+        return StreamingPolicyReport(
+            report_name=f"Policy Evaluation Report - {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')}",
+            target_api=target_api,
+            generated_at=datetime.utcnow(),
+            total_requests_evaluated=summary.requests,
+            requests_with_violations=summary.requests_with_violations,
+            total_violations=sum(summary.severity_counts),
+            violations_by_rule=summary.violations_by_rule,
+            violations_by_endpoint=summary.violations_by_endpoint,
+            evaluations_path=self.config.evaluations_path,
+            **self._summarize_violations(summary.severity_counts, summary.violations_by_rule)
+        )
+    
+    def _summarize_violations(self, severity_counts: List[int], violations_by_rule: Dict[str, int]) -> Dict[str, Any]:
+        """Severity breakdown, risk assessment and compliance issues shared by both report types"""
+        # Violation breakdown; severities are counted as evaluations are retained
+        violations_by_severity = {severity: severity_counts[rank]
+                                  for severity, rank in SEVERITY_RANK.items() if severity_counts[rank]}
+        
+        total_violations = sum(severity_counts)
         
         # Calculate risk score
         if total_violations > 0:
-            critical_count = violations_by_severity.get(SeverityLevel.CRITICAL, 0)
-            high_count = violations_by_severity.get(SeverityLevel.HIGH, 0)
-            medium_count = violations_by_severity.get(SeverityLevel.MEDIUM, 0)
+            _, medium_count, high_count, critical_count = severity_counts
             
             risk_score = min(10, (critical_count * 3 + high_count * 2 + medium_count) / total_violations * 10)
         else:
@@ -628,25 +1171,16 @@ class PolicyEngine:
         
         # Generate compliance issues
         compliance_issues = []
-        if violations_by_severity.get(SeverityLevel.CRITICAL, 0) > 0:
+        if severity_counts[SEVERITY_RANK[SeverityLevel.CRITICAL]] > 0:
             compliance_issues.append("Critical policy violations detected")
         if violations_by_rule.get("No Plaintext Passwords", 0) > 0:
             compliance_issues.append("Plaintext passwords detected in API traffic")
         if violations_by_rule.get("Require Authentication", 0) > 0:
             compliance_issues.append("Unauthenticated access to sensitive endpoints")
         
-        return PolicyReport(
-            report_name=f"Policy Evaluation Report - {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')}",
-            target_api=target_api,
-            generated_at=datetime.utcnow(),
-            total_requests_evaluated=total_requests,
-            requests_with_violations=requests_with_violations,
-            total_violations=total_violations,
-            violations_by_severity=violations_by_severity,
-            violations_by_rule=violations_by_rule,
-            violations_by_endpoint=violations_by_endpoint,
-            evaluations=self.evaluations,
-            overall_risk_score=risk_score,
-            overall_risk_level=overall_risk_level,
-            compliance_issues=compliance_issues
-        ) 
\ No newline at end of file
+        return {
+            "violations_by_severity": violations_by_severity,
+            "overall_risk_score": risk_score,
+            "overall_risk_level": overall_risk_level,
+            "compliance_issues": compliance_issues,
+        } 
\ No newline at end of file
@@ -1,5 +1,7 @@
-from pydantic import BaseModel, Field
-from typing import Optional, Dict, List, Any, Union
+import re
+import sys
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, field_validator, model_validator
+from typing import Optional, Dict, List, Any, Iterator, Union
 from datetime import datetime
 from enum import Enum
 
@@ -52,6 +54,15 @@ class SeverityLevel(str, Enum):
     HIGH = "high"
     CRITICAL = "critical"
 
+# Regex flags used by each condition type that can take a regex operator
+REGEX_FLAGS = {
+    ConditionType.ENDPOINT_MATCH: 0,
+    ConditionType.HEADER_VALUE: 0,
+    ConditionType.BODY_CONTAINS: re.IGNORECASE,
+    ConditionType.CUSTOM_REGEX: re.IGNORECASE,
+}
+REGEX_OPERATORS = (OperatorType.REGEX_MATCH, OperatorType.REGEX_NOT_MATCH)
+
 class PolicyCondition(BaseModel):
     """Represents a condition in a policy rule"""
     type: ConditionType = Field(..., description="Type of condition")
@@ -60,8 +71,26 @@ class PolicyCondition(BaseModel):
     value: Any = Field(..., description="Value to compare against")
     description: str = Field(..., description="Human-readable description")
     
-    class Config:
-        from_attributes = True
+    # Pattern compiled from value when the condition uses a regex operator
+    _compiled: Optional[re.Pattern] = PrivateAttr(default=None)
+    
+    model_config = ConfigDict(frozen=True, from_attributes=True)
+    
+    @model_validator(mode="after")
+    def compile_regex(self) -> "PolicyCondition":
+        """Compile regex values once, rejecting invalid patterns at load time"""
+        flags = REGEX_FLAGS.get(self.type)
+        if flags is not None and self.operator in REGEX_OPERATORS:
+            try:
+                self._compiled = re.compile(self.value, flags)
+            except (re.error, TypeError) as e:
+                raise ValueError(f"invalid regex {self.value!r}: {e}")
+        return self
+    
+    @property
+    def compiled(self) -> Optional[re.Pattern]:
+        """Compiled regex for regex operators, else None"""
+        return self._compiled
 
 class PolicyAction(BaseModel):
     """Represents an action to take when a rule is violated"""
@@ -69,8 +98,7 @@ class PolicyAction(BaseModel):
     parameters: Dict[str, Any] = Field(default_factory=dict, description="Action parameters")
     description: str = Field(..., description="Human-readable description")
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(frozen=True, from_attributes=True)
 
 class PolicyRule(BaseModel):
     """Represents a single policy rule"""
@@ -93,8 +121,10 @@ class PolicyRule(BaseModel):
     updated_at: datetime = Field(default_factory=datetime.utcnow, description="Last update time")
     tags: List[str] = Field(default_factory=list, description="Rule tags")
     
-    class Config:
-        from_attributes = True
+    # Slotted evaluation plan, filled in by PolicyEngine.precompile()
+    _plan: Any = PrivateAttr(default=None)
+    
+    model_config = ConfigDict(from_attributes=True)
 
 class PolicyViolation(BaseModel):
     """Represents a policy violation"""
@@ -120,8 +150,13 @@ class PolicyViolation(BaseModel):
     # Actions taken
     actions_taken: List[str] = Field(default_factory=list, description="Actions that were taken")
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+    
+    @field_validator("rule_id", "rule_name", "endpoint", "method")
+    @classmethod
+    def intern_key(cls, value: str) -> str:
+        """Intern strings that recur across violations and key the report breakdowns"""
+        return sys.intern(value)
 
 class PolicyEvaluation(BaseModel):
     """Represents the evaluation of a single request/response against policies"""
@@ -146,8 +181,13 @@ class PolicyEvaluation(BaseModel):
     overall_severity: SeverityLevel = Field(..., description="Overall severity level")
     blocked: bool = Field(default=False, description="Whether request was blocked")
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+    
+    @field_validator("endpoint", "method")
+    @classmethod
+    def intern_key(cls, value: str) -> str:
+        """Intern strings that recur across evaluations"""
+        return sys.intern(value)
 
 class PolicyReport(BaseModel):
     """Comprehensive policy evaluation report"""
@@ -176,8 +216,48 @@ class PolicyReport(BaseModel):
     # Compliance
     compliance_issues: List[str] = Field(default_factory=list, description="Compliance issues found")
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+class StreamingPolicyReport(BaseModel):
+    """Policy evaluation report whose evaluations stay in a JSON Lines file"""
+    id: Optional[str] = None
+    report_name: str = Field(..., description="Report name")
+    target_api: str = Field(..., description="Target API URL")
+    generated_at: datetime = Field(default_factory=datetime.utcnow, description="Report generation time")
+    
+    # Summary statistics
+    total_requests_evaluated: int = Field(..., description="Total requests evaluated")
+    requests_with_violations: int = Field(..., description="Requests with violations")
+    total_violations: int = Field(..., description="Total policy violations")
+    
+    # Violation breakdown
+    violations_by_severity: Dict[SeverityLevel, int] = Field(default_factory=dict, description="Violations by severity")
+    violations_by_rule: Dict[str, int] = Field(default_factory=dict, description="Violations by rule")
+    violations_by_endpoint: Dict[str, int] = Field(default_factory=dict, description="Violations by endpoint")
+    
+    # Detailed results, one PolicyEvaluation per line
+    evaluations_path: str = Field(..., description="JSON Lines file of detailed evaluations")
+    
+    # Risk assessment
+    overall_risk_score: float = Field(..., description="Overall risk score (0-10)")
+    overall_risk_level: SeverityLevel = Field(..., description="Overall risk level")
+    
+    # Compliance
+    compliance_issues: List[str] = Field(default_factory=list, description="Compliance issues found")
+    
+    model_config = ConfigDict(from_attributes=True)
+    
+    def iter_evaluations(self) -> Iterator[PolicyEvaluation]:
+        """Read the detailed evaluations back one line at a time"""
+        with open(self.evaluations_path, 'rb') as f:
+            for line in f:
+                if line.strip():
+                    yield PolicyEvaluation.model_validate_json(line)
+    
+    @property
+    def evaluations(self) -> Iterator[PolicyEvaluation]:
+        """Detailed evaluations, streamed so report writers can treat this like a PolicyReport"""
+        return self.iter_evaluations()
 
 class PolicyConfig(BaseModel):
     """Configuration for policy engine"""
@@ -195,13 +275,14 @@ class PolicyConfig(BaseModel):
     generate_reports: bool = Field(default=True, description="Generate evaluation reports")
     report_format: str = Field(default="json", description="Report format")
     include_evidence: bool = Field(default=True, description="Include evidence in reports")
+    max_evaluations_retained: Optional[int] = Field(default=None, description="Most recent evaluations kept for reports (None keeps all)")
+    evaluations_path: Optional[str] = Field(default=None, description="JSON Lines file every evaluation is appended to, for streaming reports")
     
     # Custom settings
     custom_rules_file: Optional[str] = Field(default=None, description="Custom rules file path")
     policy_directory: str = Field(default="policies", description="Policy directory")
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class PolicyTemplate(BaseModel):
     """Template for creating policy rules"""
@@ -216,8 +297,7 @@ class PolicyTemplate(BaseModel):
     # Parameters
     parameters: List[Dict[str, Any]] = Field(default_factory=list, description="Template parameters")
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class PolicySet(BaseModel):
     """Collection of related policy rules"""
@@ -234,5 +314,4 @@ class PolicySet(BaseModel):
     updated_at: datetime = Field(default_factory=datetime.utcnow, description="Last update time")
     tags: List[str] = Field(default_factory=list, description="Policy set tags")
     
-    class Config:
-        from_attributes = True 
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True) 
\ No newline at end of file
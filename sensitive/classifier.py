@@ -1,27 +1,137 @@
 import re
-import json
 import sqlite3
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Callable
 from datetime import datetime
 import hashlib
+import threading
+from collections import Counter
+from functools import lru_cache
+from operator import attrgetter
 from urllib.parse import urlparse, parse_qs
 
+try:
+    import hyperscan
+except ImportError:  # optional, only speeds up scanning payloads for every pattern
+    hyperscan = None
+
+try:
+    import re2
+except ImportError:  # optional, only used when ClassifierConfig.use_re2 is set
+    re2 = None
+
 from models import (
     SensitiveDataType, DataLocation, SeverityLevel, SensitiveDataMatch,
     SensitiveDataAnalysis, SensitiveDataReport, DetectionPattern,
     ClassifierConfig, DataFlowAnalysis
 )
 
+# Luhn digit value of each doubled digit
+LUHN_DOUBLED = (0, 2, 4, 6, 8, 1, 3, 5, 7, 9)
+
+def luhn_valid(number: str) -> bool:
+    """Whether the digits of number pass the Luhn mod-10 checksum card numbers carry"""
+    digits = [int(char) for char in number if char.isdigit()]
+    if not digits:
+        return False
+    total = sum(digits[-1::-2]) + sum(LUHN_DOUBLED[digit] for digit in digits[-2::-2])
+    return total % 10 == 0
+
+class LuhnFilter:
+    """Compiled pattern wrapper whose search only accepts matches that pass the Luhn check"""
+    __slots__ = ("pattern",)
+    
+    def __init__(self, pattern):
+        self.pattern = pattern
+    
+    def search(self, text: str):
+        for match in self.pattern.finditer(text):
+            if luhn_valid(match.group()):
+                return match
+        return None
+
 class SensitiveDataClassifier:
     """Classifier for detecting sensitive data in API payloads"""
     
+    # Values made only of base64 characters; hex digits are a subset
+    _ENCODED_RE = re.compile(r'[A-Za-z0-9+/=]+')
+    
+    # Masked prefixes of SSNs and card numbers, which keep only their last four digits
+    _SSN_MASK = "***-**-"
+    _CARD_MASK = "****-****-****-"
+    
+    # Locations where exposed data is riskier than in the request
+    _RESPONSE_LOCATIONS = frozenset((DataLocation.RESPONSE_BODY, DataLocation.RESPONSE_HEADER))
+    
+    # Numbered or named backreferences, which cannot be combined into one alternation
+    _BACKREFERENCE_RE = re.compile(r'\\[1-9]|\(\?P=')
+    
+    # Distinct values whose scan results are remembered, and the longest value worth remembering
+    _MEMO_SIZE = 4096
+    _MEMO_MAX_LENGTH = 1024
+    
     def __init__(self, config: ClassifierConfig):
         self.config = config
         self.patterns = self._initialize_patterns()
         self.analyses: List[SensitiveDataAnalysis] = []
         
+        # Exposure risk for every (base risk, in response, encrypted, masked) combination
+        self._risk_table = {
+            (risk, in_response, is_encrypted, is_masked): self._adjust_risk(risk, in_response, is_encrypted, is_masked)
+            for risk in SeverityLevel
+            for in_response in (False, True)
+            for is_encrypted in (False, True)
+            for is_masked in (False, True)
+        }
+        
+        # Compiled regex per pattern, keyed by id(pattern)
+        self._compiled = {id(pattern): self._compile_pattern(pattern) for pattern in self.patterns}
+        
+        # Indexes of the patterns matched by field name, by lowercase name, and of the rest
+        self._key_patterns: Dict[str, set] = {}
+        self._value_patterns: List[int] = []
+        for i, pattern in enumerate(self.patterns):
+            if pattern.key_names:
+                for key_name in pattern.key_names:
+                    self._key_patterns.setdefault(key_name.lower(), set()).add(i)
+            else:
+                self._value_patterns.append(i)
+        
+        # Literals each value pattern needs in the lowercased text before its regex is worth running
+        self._required_literals = {i: self.patterns[i].required_literals for i in self._value_patterns
+                                   if self.patterns[i].required_literals}
+        
+        # Shortest text any value pattern can match; anything shorter is not scanned at all
+        self._min_value_length = min((self.patterns[i].min_length for i in self._value_patterns), default=0)
+        
+        # One-pass prefilter over all value patterns, when hyperscan is installed
+        self._pattern_db = self._build_pattern_db()
+        # Hyperscan scratch space per thread; compiled re and RE2 patterns are safe to share
+        self._thread_state = threading.local()
+        
+        # Otherwise one alternation of all value patterns rules out most texts in a single search
+        self._combined_pattern = self._build_combined_pattern() if self._pattern_db is None else None
+        # Generated per-pattern checks for what the alternation lets through
+        self._scan_values = self._build_value_scanner()
+        
+        # Scan results for recently seen values; tokens and IDs recur across requests
+        self._memo_pattern_ids = lru_cache(maxsize=self._MEMO_SIZE)(self._scan_pattern_ids)
+        
     def _initialize_patterns(self) -> List[DetectionPattern]:
         """Initialize detection patterns for sensitive data"""
+        patterns = list(self._builtin_patterns())
+        
+        # Add custom patterns
+        if self.config.enable_custom_patterns:
+            patterns.extend(self.config.custom_patterns)
+        
+        return patterns
+    
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def _builtin_patterns() -> Tuple[DetectionPattern, ...]:
+        """Built-in detection patterns, created and compiled once and shared by every classifier"""
+        # Patterns stick to the syntax re, RE2 and hyperscan share: no lookarounds or backreferences.
+        # Field-name patterns match on key_names; their regex documents the JSON they describe
         patterns = []
         
         # Email patterns
@@ -29,6 +139,8 @@ class SensitiveDataClassifier:
             name="Email Address",
             data_type=SensitiveDataType.EMAIL,
             regex_pattern=r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
+            required_literals=["@"],
+            min_length=6,
             confidence=0.9,
             risk_level=SeverityLevel.MEDIUM,
             description="Email address detection"
@@ -39,6 +151,7 @@ class SensitiveDataClassifier:
             name="Phone Number",
             data_type=SensitiveDataType.PHONE,
             regex_pattern=r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b',
+            min_length=10,
             confidence=0.8,
             risk_level=SeverityLevel.MEDIUM,
             description="US phone number detection"
@@ -49,6 +162,8 @@ class SensitiveDataClassifier:
             name="Social Security Number",
             data_type=SensitiveDataType.SSN,
             regex_pattern=r'\b\d{3}-\d{2}-\d{4}\b',
+            required_literals=["-"],
+            min_length=11,
             confidence=0.95,
             risk_level=SeverityLevel.CRITICAL,
             description="US Social Security Number"
@@ -59,6 +174,7 @@ class SensitiveDataClassifier:
             name="Credit Card Number",
             data_type=SensitiveDataType.CREDIT_CARD,
             regex_pattern=r'\b\d{4}[- ]?\d{4}[- ]?\d{4}[- ]?\d{4}\b',
+            min_length=16,
             confidence=0.85,
             risk_level=SeverityLevel.CRITICAL,
             description="Credit card number detection"
@@ -69,6 +185,7 @@ class SensitiveDataClassifier:
             name="Password Field",
             data_type=SensitiveDataType.PASSWORD,
             regex_pattern=r'"password"\s*:\s*"[^"]*"',
+            key_names=["password"],
             confidence=0.9,
             risk_level=SeverityLevel.HIGH,
             description="Password field in JSON"
@@ -79,15 +196,20 @@ class SensitiveDataClassifier:
             name="Bearer Token",
             data_type=SensitiveDataType.TOKEN,
             regex_pattern=r'Bearer\s+[A-Za-z0-9\-._~+/]+=*',
+            required_literals=["bearer"],
+            min_length=8,
             confidence=0.8,
             risk_level=SeverityLevel.HIGH,
             description="Bearer token in headers"
         ))
         
+        # Dash last in each class: "9-_" was a range that also took ":;<>?@[\]^"
         patterns.append(DetectionPattern(
             name="JWT Token",
             data_type=SensitiveDataType.TOKEN,
-            regex_pattern=r'eyJ[A-Za-z0-9-_=]+\.[A-Za-z0-9-_=]+\.?[A-Za-z0-9-_.+/=]*',
+            regex_pattern=r'eyJ[A-Za-z0-9_=-]+\.[A-Za-z0-9_=-]+\.?[A-Za-z0-9_.+/=-]*',
+            required_literals=["eyj", "."],
+            min_length=6,
             confidence=0.9,
             risk_level=SeverityLevel.HIGH,
             description="JWT token detection"
@@ -98,6 +220,8 @@ class SensitiveDataClassifier:
             name="API Key",
             data_type=SensitiveDataType.API_KEY,
             regex_pattern=r'[Xx]-[Aa][Pp][Ii]-[Kk][Ee][Yy]\s*:\s*[^\s]+',
+            required_literals=["x-api-key"],
+            min_length=11,
             confidence=0.8,
             risk_level=SeverityLevel.HIGH,
             description="API key in headers"
@@ -108,6 +232,7 @@ class SensitiveDataClassifier:
             name="Full Name",
             data_type=SensitiveDataType.NAME,
             regex_pattern=r'"name"\s*:\s*"[^"]*"|"full_name"\s*:\s*"[^"]*"',
+            key_names=["name", "full_name"],
             confidence=0.7,
             risk_level=SeverityLevel.MEDIUM,
             description="Name field in JSON"
@@ -118,6 +243,7 @@ class SensitiveDataClassifier:
             name="Address",
             data_type=SensitiveDataType.ADDRESS,
             regex_pattern=r'"address"\s*:\s*"[^"]*"',
+            key_names=["address"],
             confidence=0.6,
             risk_level=SeverityLevel.MEDIUM,
             description="Address field in JSON"
@@ -128,6 +254,7 @@ class SensitiveDataClassifier:
             name="Date of Birth",
             data_type=SensitiveDataType.DATE_OF_BIRTH,
             regex_pattern=r'"dob"\s*:\s*"[^"]*"|"date_of_birth"\s*:\s*"[^"]*"',
+            key_names=["dob", "date_of_birth"],
             confidence=0.8,
             risk_level=SeverityLevel.HIGH,
             description="Date of birth field"
@@ -138,6 +265,8 @@ class SensitiveDataClassifier:
             name="IP Address",
             data_type=SensitiveDataType.IP_ADDRESS,
             regex_pattern=r'\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b',
+            required_literals=["."],
+            min_length=7,
             confidence=0.7,
             risk_level=SeverityLevel.LOW,
             description="IP address detection"
@@ -148,6 +277,8 @@ class SensitiveDataClassifier:
             name="UUID",
             data_type=SensitiveDataType.UUID,
             regex_pattern=r'\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b',
+            required_literals=["-"],
+            min_length=36,
             confidence=0.9,
             risk_level=SeverityLevel.LOW,
             description="UUID detection"
@@ -158,16 +289,128 @@ class SensitiveDataClassifier:
             name="Session ID",
             data_type=SensitiveDataType.SESSION_ID,
             regex_pattern=r'"session_id"\s*:\s*"[^"]*"|"sessionId"\s*:\s*"[^"]*"',
+            key_names=["session_id", "sessionId"],
             confidence=0.8,
             risk_level=SeverityLevel.MEDIUM,
             description="Session ID field"
         ))
         
-        # Add custom patterns
-        if self.config.enable_custom_patterns:
-            patterns.extend(self.config.custom_patterns)
-        
-        return patterns
+        return tuple(patterns)
+    
+    def _compile_pattern(self, pattern: DetectionPattern):
+        """RE2 regex for a pattern when configured and RE2 accepts it, else the stdlib one"""
+        compiled = pattern.compiled
+        if self.config.use_re2 and re2 is not None:
+            try:
+                compiled = re2.compile(f"(?i){pattern.regex_pattern}")
+            except Exception:
+                # Syntax RE2 does not support; keep backtracking for this pattern only
+                pass
+        
+        # Card-shaped numbers only count when their check digit is right
+        if pattern.data_type == SensitiveDataType.CREDIT_CARD:
+            return LuhnFilter(compiled)
+        return compiled
+    
+    def _build_pattern_db(self):
+        """Hyperscan database finding candidate patterns in one scan, or None to search for each one"""
+        if hyperscan is None or not self._value_patterns:
+            return None
+        
+        # Prefilter mode reports a superset of the re matches (and accepts constructs hyperscan
+        # cannot match exactly); candidates are confirmed with the compiled pattern
+        flags = (hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP
+                 | hyperscan.HS_FLAG_PREFILTER | hyperscan.HS_FLAG_SINGLEMATCH)
+        try:
+            db = hyperscan.Database()
+            db.compile(
+                expressions=[self.patterns[i].regex_pattern.encode() for i in self._value_patterns],
+                ids=self._value_patterns,
+                elements=len(self._value_patterns),
+                flags=[flags] * len(self._value_patterns)
+            )
+        except Exception as e:
+            print(f"⚠️  Hyperscan unavailable for these patterns, searching each one: {e}")
+            return None
+        return db
+    
+    def _build_combined_pattern(self) -> Optional[re.Pattern]:
+        """Alternation of every value pattern, matching wherever any of them would, or None"""
+        if self.config.use_re2 or not self._value_patterns:
+            return None
+        sources = [self.patterns[i].regex_pattern for i in self._value_patterns]
+        if any(self._BACKREFERENCE_RE.search(source) for source in sources):
+            # Group numbers shift inside the alternation
+            return None
+        try:
+            return re.compile("|".join(f"(?:{source})" for source in sources), re.IGNORECASE)
+        except re.error:
+            # e.g. inline global flags, only allowed at the start of a pattern
+            return None
+    
+    def _build_value_scanner(self) -> Callable[[str], frozenset]:
+        """Generate one function testing text against every value pattern, with their checks inlined"""
+        namespace = {}
+        params = ["text"]
+        checks = []
+        for i in self._value_patterns:
+            pattern = self.patterns[i]
+            namespace[f"_s{i}"] = self._compiled[id(pattern)].search
+            params.append(f"_s{i}=_s{i}")
+            conditions = [f"n >= {pattern.min_length}"] if pattern.min_length else []
+            conditions += [f"{literal!r} in lowered" for literal in self._required_literals.get(i, ())]
+            conditions.append(f"_s{i}(text) is not None")
+            checks.append(f"    if {' and '.join(conditions)}:\n        found.append({i})\n")
+        
+        source = (f"def scan({', '.join(params)}):\n"
+                  "    n = len(text)\n"
+                  "    lowered = text.lower()\n"
+                  "    found = []\n"
+                  f"{''.join(checks)}"
+                  "    return frozenset(found)\n")
+        exec(compile(source, "<value patterns>", "exec"), namespace)
+        return namespace["scan"]
+    
+    def _scan_scratch(self):
+        """This thread's hyperscan scratch, as concurrent scans must not share one"""
+        scratch = getattr(self._thread_state, "scratch", None)
+        if scratch is None:
+            scratch = self._thread_state.scratch = hyperscan.Scratch(self._pattern_db)
+        return scratch
+    
+    def _matching_pattern_ids(self, text: str) -> frozenset:
+        """Indexes into self.patterns of the value patterns that match text"""
+        if len(text) > self._MEMO_MAX_LENGTH:
+            return self._scan_pattern_ids(text)
+        return self._memo_pattern_ids(text)
+    
+    def _scan_pattern_ids(self, text: str) -> frozenset:
+        """Scan text for every value pattern"""
+        if len(text) < self._min_value_length:
+            return frozenset()
+        
+        if self._pattern_db is not None:
+            try:
+                data = text.encode()
+            except UnicodeEncodeError:
+                data = None
+            if data is not None:
+                candidates = set()
+                self._pattern_db.scan(data, match_event_handler=lambda pattern_id, start, end, flags, context:
+                                      candidates.add(pattern_id), scratch=self._scan_scratch())
+                return frozenset(i for i in candidates if self._matches_pattern(text, self.patterns[i]))
+        
+        if self._combined_pattern is not None and self._combined_pattern.search(text) is None:
+            return frozenset()
+        return self._scan_values(text)
+    
+    def _field_pattern_ids(self, name: str, value: str) -> frozenset:
+        """Indexes of the patterns matching a named field: its value, or its name"""
+        pattern_ids = self._matching_pattern_ids(value)
+        key_pattern_ids = self._key_patterns.get(str(name).lower())
+        if key_pattern_ids:
+            pattern_ids = pattern_ids | key_pattern_ids
+        return pattern_ids
     
     def analyze_request_response(self, endpoint: str, method: str, 
                                request_headers: Dict[str, str], 
@@ -178,6 +421,8 @@ class SensitiveDataClassifier:
                                response_status: int) -> SensitiveDataAnalysis:
         """Analyze a single request/response for sensitive data"""
         
+        # One clock read stamps the analysis and every match it finds
+        detected_at = datetime.utcnow()
         analysis = SensitiveDataAnalysis(
             endpoint=endpoint,
             method=method,
@@ -186,131 +431,143 @@ class SensitiveDataClassifier:
             request_params=request_params,
             response_headers=response_headers,
             response_body=response_body,
-            response_status=response_status
+            response_status=response_status,
+            timestamp=detected_at
         )
         
         # Analyze request headers
         if self.config.analyze_headers:
-            header_matches = self._analyze_headers(request_headers, DataLocation.REQUEST_HEADER)
+            header_matches = self._analyze_headers(request_headers, DataLocation.REQUEST_HEADER, detected_at)
             analysis.sensitive_data_found.extend(header_matches)
         
         # Analyze request body
         if self.config.analyze_body and request_body:
-            body_matches = self._analyze_json_data(request_body, DataLocation.REQUEST_BODY)
+            body_matches = self._analyze_json_data(request_body, DataLocation.REQUEST_BODY, detected_at)
             analysis.sensitive_data_found.extend(body_matches)
         
         # Analyze request parameters
         if self.config.analyze_params and request_params:
-            param_matches = self._analyze_params(request_params, DataLocation.REQUEST_PARAMS)
+            param_matches = self._analyze_params(request_params, DataLocation.REQUEST_PARAMS, detected_at)
             analysis.sensitive_data_found.extend(param_matches)
         
         # Analyze response headers
         if self.config.analyze_headers:
-            response_header_matches = self._analyze_headers(response_headers, DataLocation.RESPONSE_HEADER)
+            response_header_matches = self._analyze_headers(response_headers, DataLocation.RESPONSE_HEADER, detected_at)
             analysis.sensitive_data_found.extend(response_header_matches)
         
         # Analyze response body
         if self.config.analyze_body and response_body:
-            response_body_matches = self._analyze_json_data(response_body, DataLocation.RESPONSE_BODY)
+            response_body_matches = self._analyze_json_data(response_body, DataLocation.RESPONSE_BODY, detected_at)
             analysis.sensitive_data_found.extend(response_body_matches)
         
         # Update analysis statistics
         analysis.total_matches = len(analysis.sensitive_data_found)
-        analysis.has_critical_data = any(match.exposure_risk == SeverityLevel.CRITICAL for match in analysis.sensitive_data_found)
-        analysis.has_high_risk_data = any(match.exposure_risk in [SeverityLevel.HIGH, SeverityLevel.CRITICAL] for match in analysis.sensitive_data_found)
         
-        # Determine overall risk level
-        analysis.overall_risk = self._determine_overall_risk(analysis.sensitive_data_found)
+        # Determine overall risk level; the risk flags follow from it without rescanning matches
+        overall_risk = self._determine_overall_risk(analysis.sensitive_data_found)
+        analysis.overall_risk = overall_risk
+        analysis.has_critical_data = overall_risk == SeverityLevel.CRITICAL
+        analysis.has_high_risk_data = overall_risk in (SeverityLevel.HIGH, SeverityLevel.CRITICAL)
         
         # Generate recommendations
         analysis.recommendations = self._generate_recommendations(analysis)
         
         return analysis
     
-    def _analyze_headers(self, headers: Dict[str, str], location: DataLocation) -> List[SensitiveDataMatch]:
+    def _analyze_headers(self, headers: Dict[str, str], location: DataLocation,
+                         detected_at: datetime) -> List[SensitiveDataMatch]:
         """Analyze headers for sensitive data"""
         matches = []
-        headers_str = json.dumps(headers)
-        
-        for pattern in self.patterns:
-            if pattern.data_type in [SensitiveDataType.TOKEN, SensitiveDataType.API_KEY]:
-                # Special handling for auth headers
-                for header_name, header_value in headers.items():
-                    if self._matches_pattern(header_value, pattern):
-                        matches.append(self._create_match(
-                            pattern, header_value, location, header_name, header_value
-                        ))
-            else:
-                # General header analysis
-                if self._matches_pattern(headers_str, pattern):
-                    # Find the specific header that matched
-                    for header_name, header_value in headers.items():
-                        if self._matches_pattern(header_value, pattern):
-                            matches.append(self._create_match(
-                                pattern, header_value, location, header_name, header_value
-                            ))
+        
+        # Each header value is matched against all patterns once
+        matched = [self._field_pattern_ids(header_name, header_value)
+                   for header_name, header_value in headers.items()]
+        
+        for i, pattern in enumerate(self.patterns):
+            for (header_name, header_value), pattern_ids in zip(headers.items(), matched):
+                if i in pattern_ids:
+                    matches.append(self._create_match(
+                        pattern, header_value, location, header_name, header_value, detected_at
+                    ))
         
         return matches
     
-    def _analyze_json_data(self, data: Dict[str, Any], location: DataLocation) -> List[SensitiveDataMatch]:
+    def _analyze_json_data(self, data: Dict[str, Any], location: DataLocation,
+                           detected_at: datetime) -> List[SensitiveDataMatch]:
         """Analyze JSON data for sensitive data"""
         matches = []
-        data_str = json.dumps(data)
         
-        for pattern in self.patterns:
-            if self._matches_pattern(data_str, pattern):
-                # Find specific fields that matched
-                matches.extend(self._find_matching_fields(data, pattern, location))
+        # Walk the data once, then match each string field against all patterns
+        fields = self._string_fields(data)
+        matched = [self._field_pattern_ids(key, value) for key, _, value in fields]
+        
+        for i, pattern in enumerate(self.patterns):
+            for (_, field_path, value), pattern_ids in zip(fields, matched):
+                if i in pattern_ids:
+                    matches.append(self._create_match(
+                        pattern, value, location, field_path, value, detected_at
+                    ))
         
         return matches
     
-    def _analyze_params(self, params: Dict[str, Any], location: DataLocation) -> List[SensitiveDataMatch]:
+    def _analyze_params(self, params: Dict[str, Any], location: DataLocation,
+                        detected_at: datetime) -> List[SensitiveDataMatch]:
         """Analyze URL parameters for sensitive data"""
         matches = []
-        params_str = json.dumps(params)
         
-        for pattern in self.patterns:
-            if self._matches_pattern(params_str, pattern):
-                for param_name, param_value in params.items():
-                    if self._matches_pattern(str(param_value), pattern):
-                        matches.append(self._create_match(
-                            pattern, str(param_value), location, param_name, str(param_value)
-                        ))
+        # Each parameter is matched against all patterns once
+        params = [(param_name, str(param_value)) for param_name, param_value in params.items()]
+        matched = [self._field_pattern_ids(param_name, param_value) for param_name, param_value in params]
+        
+        for i, pattern in enumerate(self.patterns):
+            for (param_name, param_value), pattern_ids in zip(params, matched):
+                if i in pattern_ids:
+                    matches.append(self._create_match(
+                        pattern, param_value, location, param_name, param_value, detected_at
+                    ))
         
         return matches
     
-    def _find_matching_fields(self, data: Dict[str, Any], pattern: DetectionPattern, location: DataLocation) -> List[SensitiveDataMatch]:
-        """Find specific fields in JSON data that match a pattern"""
-        matches = []
+    def _string_fields(self, data: Dict[str, Any]) -> List[Tuple[str, str, str]]:
+        """Key, path and value of every string field in JSON data, in document order"""
+        fields = []
+        
+        # Depth-first walk with an explicit stack of (items iterator, path, is_dict) frames
+        if isinstance(data, dict):
+            stack = [(iter(data.items()), "", True)]
+        elif isinstance(data, list):
+            stack = [(enumerate(data), "", False)]
+        else:
+            stack = []
         
-        def search_recursive(obj, path=""):
-            if isinstance(obj, dict):
-                for key, value in obj.items():
+        while stack:
+            items, path, is_dict = stack[-1]
+            for key, value in items:
+                if is_dict:
                     current_path = f"{path}.{key}" if path else key
                     if isinstance(value, str):
-                        if self._matches_pattern(value, pattern):
-                            matches.append(self._create_match(
-                                pattern, value, location, current_path, value
-                            ))
-                    elif isinstance(value, (dict, list)):
-                        search_recursive(value, current_path)
-            elif isinstance(obj, list):
-                for i, item in enumerate(obj):
-                    current_path = f"{path}[{i}]"
-                    search_recursive(item, current_path)
-        
-        search_recursive(data)
-        return matches
+                        fields.append((key, current_path, value))
+                        continue
+                else:
+                    current_path = f"{path}[{key}]"
+                
+                if isinstance(value, dict):
+                    stack.append((iter(value.items()), current_path, True))
+                    break
+                if isinstance(value, list):
+                    stack.append((enumerate(value), current_path, False))
+                    break
+            else:
+                stack.pop()
+        
+        return fields
     
     def _matches_pattern(self, text: str, pattern: DetectionPattern) -> bool:
         """Check if text matches a pattern"""
-        try:
-            return bool(re.search(pattern.regex_pattern, text, re.IGNORECASE))
-        except re.error:
-            return False
+        return self._compiled[id(pattern)].search(text) is not None
     
     def _create_match(self, pattern: DetectionPattern, value: str, location: DataLocation, 
-                     field_name: str, original_value: str) -> SensitiveDataMatch:
+                     field_name: str, original_value: str, detected_at: datetime) -> SensitiveDataMatch:
         """Create a sensitive data match"""
         
         # Mask the value if configured
@@ -326,7 +583,9 @@ class SensitiveDataClassifier:
         # Determine exposure risk
         exposure_risk = self._determine_exposure_risk(pattern, location, is_encrypted, is_masked)
         
-        return SensitiveDataMatch(
+        # Create match without validation: pattern fields are already typed, and the
+        # value, field name and flags come from the analyzed strings
+        return SensitiveDataMatch.model_construct(
             data_type=pattern.data_type,
             location=location,
             field_name=field_name,
@@ -335,7 +594,8 @@ class SensitiveDataClassifier:
             pattern_matched=pattern.name,
             is_encrypted=is_encrypted,
             is_masked=is_masked,
-            exposure_risk=exposure_risk
+            exposure_risk=exposure_risk,
+            detected_at=detected_at
         )
     
     def _mask_sensitive_data(self, value: str, data_type: SensitiveDataType) -> str:
@@ -345,63 +605,55 @@ class SensitiveDataClassifier:
         
         if data_type == SensitiveDataType.EMAIL:
             # Mask email: user@domain.com -> u***@d***.com
-            parts = value.split('@')
-            if len(parts) == 2:
-                username = parts[0]
-                domain = parts[1]
-                masked_username = username[0] + "*" * (len(username) - 1)
-                domain_parts = domain.split('.')
-                if len(domain_parts) >= 2:
-                    masked_domain = domain_parts[0][0] + "*" * (len(domain_parts[0]) - 1) + "." + domain_parts[-1]
-                    return f"{masked_username}@{masked_domain}"
+            username, _, domain = value.partition('@')
+            if domain and '@' not in domain:
+                domain_name, dot, _ = domain.partition('.')
+                if dot:
+                    top_level = domain.rpartition('.')[2]
+                    return f"{username[0]}{'*' * (len(username) - 1)}@{domain_name[0]}{'*' * (len(domain_name) - 1)}.{top_level}"
         
         elif data_type == SensitiveDataType.PHONE:
             # Mask phone: 123-456-7890 -> 123-***-7890
             if len(value) >= 10:
-                return value[:3] + "-***-" + value[-4:]
+                return f"{value[:3]}-***-{value[-4:]}"
         
         elif data_type == SensitiveDataType.SSN:
             # Mask SSN: 123-45-6789 -> ***-**-6789
             if len(value) >= 9:
-                return "***-**-" + value[-4:]
+                return self._SSN_MASK + value[-4:]
         
         elif data_type == SensitiveDataType.CREDIT_CARD:
             # Mask credit card: 1234-5678-9012-3456 -> ****-****-****-3456
             if len(value) >= 16:
-                return "****-****-****-" + value[-4:]
+                return self._CARD_MASK + value[-4:]
         
         # Default masking
-        return value[:2] + "*" * (len(value) - 4) + value[-2:] if len(value) > 4 else "*" * len(value)
+        return f"{value[:2]}{'*' * (len(value) - 4)}{value[-2:]}"
     
     def _is_encrypted(self, value: str) -> bool:
         """Check if value appears to be encrypted"""
-        # Simple heuristics for encrypted data
-        encrypted_indicators = [
-            len(value) > 32,  # Long strings
-            re.match(r'^[A-Za-z0-9+/=]+$', value),  # Base64-like
-            re.match(r'^[A-Fa-f0-9]+$', value),  # Hex-like
-        ]
-        return any(encrypted_indicators)
+        # Simple heuristics for encrypted data: long strings, or base64-like
+        # (which includes hex-like) throughout
+        return len(value) > 32 or self._ENCODED_RE.fullmatch(value) is not None
     
     def _is_masked(self, value: str) -> bool:
         """Check if value appears to be masked"""
         # Check for common masking patterns
-        masked_indicators = [
-            '*' in value,
-            '#' in value,
-            'X' in value and len(set(value)) <= 2,
-        ]
-        return any(masked_indicators)
+        return '*' in value or '#' in value or ('X' in value and len(set(value)) <= 2)
     
     def _determine_exposure_risk(self, pattern: DetectionPattern, location: DataLocation, 
                                 is_encrypted: bool, is_masked: bool) -> SeverityLevel:
         """Determine the exposure risk level"""
-        
-        # Base risk from pattern
-        base_risk = pattern.risk_level
+        return self._risk_table[(pattern.risk_level, location in self._RESPONSE_LOCATIONS,
+                                 is_encrypted, is_masked)]
+    
+    @staticmethod
+    def _adjust_risk(base_risk: SeverityLevel, in_response: bool,
+                     is_encrypted: bool, is_masked: bool) -> SeverityLevel:
+        """Exposure risk of a pattern's base risk given where and how the data appeared"""
         
         # Adjust based on location
-        if location in [DataLocation.RESPONSE_BODY, DataLocation.RESPONSE_HEADER]:
+        if in_response:
             # Data in response is more risky
             if base_risk == SeverityLevel.LOW:
                 base_risk = SeverityLevel.MEDIUM
@@ -430,17 +682,15 @@ class SensitiveDataClassifier:
         if not matches:
             return SeverityLevel.LOW
         
-        # Count by severity
-        severity_counts = {}
-        for match in matches:
-            severity_counts[match.exposure_risk] = severity_counts.get(match.exposure_risk, 0) + 1
+        # Severities present
+        severities = {match.exposure_risk for match in matches}
         
         # Determine overall risk
-        if SeverityLevel.CRITICAL in severity_counts:
+        if SeverityLevel.CRITICAL in severities:
             return SeverityLevel.CRITICAL
-        elif SeverityLevel.HIGH in severity_counts:
+        elif SeverityLevel.HIGH in severities:
             return SeverityLevel.HIGH
-        elif SeverityLevel.MEDIUM in severity_counts:
+        elif SeverityLevel.MEDIUM in severities:
             return SeverityLevel.MEDIUM
         else:
             return SeverityLevel.LOW
@@ -480,26 +730,26 @@ class SensitiveDataClassifier:
     def generate_report(self, analyses: List[SensitiveDataAnalysis], target_api: str) -> SensitiveDataReport:
         """Generate comprehensive sensitive data report"""
         
-        # Calculate statistics
+        # Calculate statistics and the breakdowns by data type, location and risk in one walk over
+        # the analyses; Counter.update over attrgetter maps tallies each analysis's matches in C
         total_requests = len(analyses)
-        requests_with_sensitive_data = len([a for a in analyses if a.total_matches > 0])
-        total_matches = sum(a.total_matches for a in analyses)
-        
-        # Breakdown by data type
-        data_type_breakdown = {}
-        location_breakdown = {}
-        risk_breakdown = {}
-        
+        requests_with_sensitive_data = 0
+        total_matches = 0
+        data_type_breakdown = Counter()
+        location_breakdown = Counter()
+        risk_breakdown = Counter()
+        data_type_of = attrgetter("data_type")
+        location_of = attrgetter("location")
+        risk_of = attrgetter("exposure_risk")
         for analysis in analyses:
-            for match in analysis.sensitive_data_found:
-                # Data type breakdown
-                data_type_breakdown[match.data_type] = data_type_breakdown.get(match.data_type, 0) + 1
-                
-                # Location breakdown
-                location_breakdown[match.location] = location_breakdown.get(match.location, 0) + 1
-                
-                # Risk breakdown
-                risk_breakdown[match.exposure_risk] = risk_breakdown.get(match.exposure_risk, 0) + 1
+            if analysis.total_matches > 0:
+                requests_with_sensitive_data += 1
+                total_matches += analysis.total_matches
+            found = analysis.sensitive_data_found
+            if found:
+                data_type_breakdown.update(map(data_type_of, found))
+                location_breakdown.update(map(location_of, found))
+                risk_breakdown.update(map(risk_of, found))
         
         # Calculate overall risk score
         if total_matches > 0:
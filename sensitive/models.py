@@ -1,4 +1,5 @@
-from pydantic import BaseModel, Field
+import re
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, model_validator
 from typing import Optional, Dict, List, Any, Union
 from datetime import datetime
 from enum import Enum
@@ -58,8 +59,7 @@ class SensitiveDataMatch(BaseModel):
     # Metadata
     detected_at: datetime = Field(default_factory=datetime.utcnow, description="When detected")
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class SensitiveDataAnalysis(BaseModel):
     """Analysis of sensitive data in a single request/response"""
@@ -90,8 +90,7 @@ class SensitiveDataAnalysis(BaseModel):
     # Recommendations
     recommendations: List[str] = Field(default_factory=list, description="Security recommendations")
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class SensitiveDataReport(BaseModel):
     """Comprehensive report of sensitive data analysis"""
@@ -120,20 +119,38 @@ class SensitiveDataReport(BaseModel):
     # Compliance
     compliance_issues: List[str] = Field(default_factory=list, description="Compliance issues found")
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class DetectionPattern(BaseModel):
     """Pattern for detecting sensitive data"""
     name: str = Field(..., description="Pattern name")
     data_type: SensitiveDataType = Field(..., description="Data type this pattern detects")
     regex_pattern: str = Field(..., description="Regex pattern for detection")
+    key_names: List[str] = Field(default_factory=list, description="Field names that mark sensitive data, matched instead of the regex")
+    required_literals: List[str] = Field(default_factory=list, description="Lowercase substrings every match contains, checked before the regex")
+    min_length: int = Field(default=0, description="Length of the shortest text the regex can match; shorter values are not searched")
     confidence: float = Field(default=0.8, description="Default confidence score")
     risk_level: SeverityLevel = Field(..., description="Default risk level")
     description: str = Field(..., description="Pattern description")
     
-    class Config:
-        from_attributes = True
+    # regex_pattern compiled once, case-insensitively as every pattern is matched
+    _compiled: Optional[re.Pattern] = PrivateAttr(default=None)
+    
+    model_config = ConfigDict(frozen=True, from_attributes=True)
+    
+    @model_validator(mode="after")
+    def compile_regex(self) -> "DetectionPattern":
+        """Compile the pattern once, rejecting invalid regexes when the pattern is created"""
+        try:
+            self._compiled = re.compile(self.regex_pattern, re.IGNORECASE)
+        except re.error as e:
+            raise ValueError(f"invalid regex {self.regex_pattern!r}: {e}")
+        return self
+    
+    @property
+    def compiled(self) -> re.Pattern:
+        """Compiled regex_pattern"""
+        return self._compiled
 
 class ClassifierConfig(BaseModel):
     """Configuration for sensitive data classifier"""
@@ -145,6 +162,7 @@ class ClassifierConfig(BaseModel):
     # Pattern settings
     min_confidence: float = Field(default=0.6, description="Minimum confidence for detection")
     max_value_length: int = Field(default=1000, description="Maximum value length to analyze")
+    use_re2: bool = Field(default=False, description="Match with RE2 (linear time) when installed")
     
     # Analysis settings
     analyze_headers: bool = Field(default=True, description="Analyze request/response headers")
@@ -158,8 +176,7 @@ class ClassifierConfig(BaseModel):
     # Custom patterns
     custom_patterns: List[DetectionPattern] = Field(default_factory=list, description="Custom detection patterns")
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class DataFlowAnalysis(BaseModel):
     """Analysis of data flow through the API"""
@@ -175,5 +192,4 @@ class DataFlowAnalysis(BaseModel):
     is_properly_authorized: bool = Field(default=False, description="Proper authorization in place")
     compliance_issues: List[str] = Field(default_factory=list, description="Compliance issues")
     
-    class Config:
-        from_attributes = True 
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True) 
\ No newline at end of file
@@ -7,16 +7,22 @@ import subprocess
 import sys
 import os
 
-def run_command(command, description):
-    """Run a command and handle errors"""
+# Fully pinned, hashed requirements (pip-compile --generate-hashes); used instead of
+# requirements.txt when present so pip can skip dependency resolution entirely
+LOCK_FILE = "requirements.lock"
+
+def run_command(command, description, cwd=None):
+    """Run a command (an argument list, without a shell) and handle errors"""
     print(f"🔧 {description}...")
+    # Flush so our progress line comes before the command's own output
+    sys.stdout.flush()
     try:
-        result = subprocess.run(command, shell=True, check=True, capture_output=True, text=True)
+        # Output goes straight to the terminal as the command produces it
+        subprocess.run(command, check=True, cwd=cwd)
         print(f"✅ {description} completed successfully")
         return True
-    except subprocess.CalledProcessError as e:
+    except (subprocess.CalledProcessError, OSError) as e:
         print(f"❌ {description} failed: {e}")
-        print(f"Error output: {e.stderr}")
         return False
 
 def main():
@@ -33,17 +39,21 @@ def main():
     
     # Install dependencies
     print("\n📦 Installing dependencies...")
-    if not run_command("pip install -r requirements.txt", "Installing Python dependencies"):
+    if os.path.exists(LOCK_FILE):
+        requirements = ["--require-hashes", "--no-deps", "-r", LOCK_FILE]
+    else:
+        requirements = ["-r", "requirements.txt"]
+    if not run_command([sys.executable, "-m", "pip", "install", "--no-input", "--disable-pip-version-check",
+                        "--prefer-binary", *requirements], "Installing Python dependencies"):
         print("❌ Failed to install dependencies")
         sys.exit(1)
     
     # Initialize the sample app database
     print("\n🗄️ Initializing sample app database...")
-    os.chdir('app')
-    if not run_command(f"{sys.executable} -c \"from database import init_db; init_db(); print('Database initialized')\"", "Initializing database"):
+    if not run_command([sys.executable, "-c", "from database import init_db; init_db(); print('Database initialized')"],
+                       "Initializing database", cwd="app"):
         print("❌ Failed to initialize database")
         sys.exit(1)
-    os.chdir('..')
     
     print("\n✅ Setup completed successfully!")
     print("\n🎯 Next steps:")
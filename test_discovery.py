@@ -8,32 +8,64 @@ This script demonstrates the API discovery functionality by:
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
-import subprocess
-import sys
+import socket
+import threading
 import os
+from concurrent.futures import ThreadPoolExecutor
 from discovery.cli import DiscoveryCLI
 
+# Probe requests in flight at once
+PROBE_WORKERS = 8
+
+# One keep-alive connection pool for every probe request, sized so no worker waits for
+# a connection; brief 502/503s while the server settles are retried rather than reported
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(
+    pool_connections=1,
+    pool_maxsize=PROBE_WORKERS,
+    max_retries=Retry(total=3, backoff_factor=0.1, status_forcelist=(502, 503), raise_on_status=False)
+))
+
+# Seconds to wait for the sample API server to come up
+SERVER_START_TIMEOUT = 10
+
+def send_request(method, url, data=None):
+    """Send one probe request through the shared session"""
+    return SESSION.request(method, url, json=data)
+
+def port_open(port: int) -> bool:
+    """Whether something on localhost is accepting connections on port"""
+    try:
+        with socket.create_connection(("127.0.0.1", port), timeout=0.1):
+            return True
+    except OSError:
+        return False
+
 def start_api_server():
-    """Start the sample FastAPI server"""
-    print("🚀 Starting sample API server...")
+    """Start the sample FastAPI server on a background thread, unless one is already running"""
+    if port_open(8000):
+        print("♻️  Using the API server already running on port 8000")
+        return None
     
-    # Change to app directory
-    os.chdir('app')
+    import uvicorn
     
-    # Start server in background
-    process = subprocess.Popen([
-        sys.executable, '-m', 'uvicorn', 'main:app', 
-        '--host', '0.0.0.0', '--port', '8000', '--reload'
-    ], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    print("🚀 Starting sample API server...")
     
-    # Wait for server to start
-    time.sleep(3)
+    # Serve in this process; uvicorn picks uvloop and httptools when they are installed
+    config = uvicorn.Config("app.main:app", host="0.0.0.0", port=8000, log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
     
-    # Change back to root directory
-    os.chdir('..')
+    # Wait until the server is accepting connections (or has failed to start)
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while not server.started and thread.is_alive() and time.monotonic() < deadline:
+        time.sleep(0.05)
     
-    return process
+    return server
 
 def make_test_requests():
     """Make various test requests to the API"""
@@ -76,14 +108,16 @@ def make_test_requests():
     
     results = []
     
-    for method, endpoint, data, description in test_requests:
+    # Send the probes concurrently, then report them in order
+    with ThreadPoolExecutor(max_workers=PROBE_WORKERS) as pool:
+        futures = [pool.submit(send_request, method, f"{base_url}{endpoint}", data)
+                   for method, endpoint, data, _ in test_requests]
+    
+    for (method, endpoint, data, description), future in zip(test_requests, futures):
         try:
             print(f"  {method} {endpoint} - {description}")
             
-            if method == "GET":
-                response = requests.get(f"{base_url}{endpoint}")
-            elif method == "POST":
-                response = requests.post(f"{base_url}{endpoint}", json=data)
+            response = future.result()
             
             print(f"    Status: {response.status_code}")
             
@@ -114,8 +148,6 @@ def make_test_requests():
                 'status': 'ERROR',
                 'description': description
             })
-        
-        time.sleep(0.5)  # Small delay between requests
     
     return results
 
@@ -7,9 +7,30 @@ This script demonstrates the OpenAPI generation functionality
 import os
 import sys
 import requests
-import time
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
 from openapi.generator import OpenAPIGenerator
 
+# Sample requests in flight at once
+PROBE_WORKERS = 8
+
+# One keep-alive connection pool for every sample request, sized so no worker waits for
+# a connection; brief 502/503s while the server settles are retried rather than reported
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(
+    pool_connections=1,
+    pool_maxsize=PROBE_WORKERS,
+    max_retries=Retry(total=3, backoff_factor=0.1, status_forcelist=(502, 503), raise_on_status=False)
+))
+
+# One generator shared by the data check, the exports and the spec summary
+GENERATOR = OpenAPIGenerator()
+
+def send_request(method, url, data=None):
+    """Send one sample request through the shared session"""
+    return SESSION.request(method, url, json=data)
+
 def check_discovery_data():
     """Check if we have discovery data to work with"""
     if not os.path.exists("discovery.db"):
@@ -19,17 +40,16 @@ def check_discovery_data():
         return False
     
     # Check if we have endpoints
-    generator = OpenAPIGenerator()
-    endpoints = generator.load_discovered_endpoints()
+    endpoint_count = GENERATOR.count_endpoints()
     
-    if not endpoints:
+    if not endpoint_count:
         print("❌ No endpoints found in discovery database!")
         print("Please make some API requests first:")
         print("  curl http://localhost:8000/health")
         print("  curl http://localhost:8000/users")
         return False
     
-    print(f"✅ Found {len(endpoints)} endpoints in discovery database")
+    print(f"✅ Found {endpoint_count} endpoints in discovery database")
     return True
 
 def make_sample_requests():
@@ -49,45 +69,47 @@ def make_sample_requests():
         ("GET", "/internal/users", None),
     ]
     
-    for method, endpoint, data in sample_requests:
+    # Send the requests concurrently, then report them in order
+    with ThreadPoolExecutor(max_workers=PROBE_WORKERS) as pool:
+        futures = [pool.submit(send_request, method, f"{base_url}{endpoint}", data)
+                   for method, endpoint, data in sample_requests]
+    
+    for (method, endpoint, data), future in zip(sample_requests, futures):
         try:
             print(f"  {method} {endpoint}")
             
-            if method == "GET":
-                response = requests.get(f"{base_url}{endpoint}")
-            elif method == "POST":
-                response = requests.post(f"{base_url}{endpoint}", json=data)
+            response = future.result()
             
             print(f"    Status: {response.status_code}")
             
         except Exception as e:
             print(f"    Error: {e}")
-        
-        time.sleep(0.5)
 
 def test_openapi_generation():
     """Test OpenAPI generation"""
     print("\n🔧 Testing OpenAPI generation...")
     
-    generator = OpenAPIGenerator()
+    generator = GENERATOR
+    
+    # Read the discovery database once for the spec and every export
+    endpoints = generator.load_discovered_endpoints()
     
     # Generate spec
-    spec = generator.generate_openapi_spec("LevoLite Sample API", "1.0.0")
+    spec = generator.generate_openapi_spec("LevoLite Sample API", "1.0.0", endpoints=endpoints)
     
     print("✅ OpenAPI specification generated successfully")
     print(f"📊 Spec contains {len(spec.paths)} paths")
     
-    # Export to YAML
-    yaml_result = generator.export_yaml("test_openapi.yaml")
-    print(f"✅ {yaml_result}")
-    
-    # Export to JSON
-    json_result = generator.export_json("test_openapi.json")
-    print(f"✅ {json_result}")
-    
-    # Export to Postman
-    postman_result = generator.export_postman("test_postman_collection.json")
-    print(f"✅ {postman_result}")
+    # Export to YAML, JSON and Postman side by side; each writes its own file
+    exports = [
+        (generator.export_yaml, "test_openapi.yaml"),
+        (generator.export_json, "test_openapi.json"),
+        (generator.export_postman, "test_postman_collection.json")
+    ]
+    with ThreadPoolExecutor(max_workers=len(exports)) as pool:
+        futures = [pool.submit(export, output_file, endpoints) for export, output_file in exports]
+        for future in futures:
+            print(f"✅ {future.result()}")
     
     return True
 
@@ -96,17 +118,24 @@ def show_generated_spec():
     print("\n📋 Generated OpenAPI Specification Details")
     print("=" * 50)
     
-    generator = OpenAPIGenerator()
-    endpoints = generator.load_discovered_endpoints()
+    generator = GENERATOR
+    endpoints = generator.load_discovered_endpoints(include_response_body=False)
     
     print(f"Total endpoints: {len(endpoints)}")
     
-    # Group by path
+    # Group by path and pick out the authenticated, sensitive and vulnerable endpoints in one pass
     paths = {}
+    auth_endpoints = []
+    sensitive_endpoints = []
+    vulnerable_endpoints = []
     for endpoint in endpoints:
-        if endpoint.path not in paths:
-            paths[endpoint.path] = []
-        paths[endpoint.path].append(endpoint)
+        paths.setdefault(endpoint.path, []).append(endpoint)
+        if endpoint.has_auth:
+            auth_endpoints.append(endpoint)
+        if endpoint.contains_sensitive_data:
+            sensitive_endpoints.append(endpoint)
+        if endpoint.potential_idor or endpoint.missing_auth:
+            vulnerable_endpoints.append(endpoint)
     
     print(f"Unique paths: {len(paths)}")
     
@@ -116,19 +145,16 @@ def show_generated_spec():
         print(f"  {path}: {', '.join(methods)}")
     
     print("\n🔐 Authentication:")
-    auth_endpoints = [e for e in endpoints if e.has_auth]
     print(f"  Authenticated endpoints: {len(auth_endpoints)}")
     for endpoint in auth_endpoints:
         print(f"    {endpoint.method.value} {endpoint.path} ({endpoint.auth_type.value})")
     
     print("\n🔴 Sensitive data:")
-    sensitive_endpoints = [e for e in endpoints if e.contains_sensitive_data]
     print(f"  Sensitive endpoints: {len(sensitive_endpoints)}")
     for endpoint in sensitive_endpoints:
         print(f"    {endpoint.method.value} {endpoint.path}")
     
     print("\n🚨 Security issues:")
-    vulnerable_endpoints = [e for e in endpoints if e.potential_idor or e.missing_auth]
     print(f"  Vulnerable endpoints: {len(vulnerable_endpoints)}")
     for endpoint in vulnerable_endpoints:
         issues = []
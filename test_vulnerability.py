@@ -164,10 +164,9 @@ def save_report_files(report):
     """Save report in multiple formats"""
     print(f"\n💾 Saving report files...")
     
-    # Save JSON report
-    import json
-    with open("vulnerability_report.json", "w") as f:
-        json.dump(report.dict(), f, indent=2, default=str)
+    # Save JSON report, encoded straight from the model
+    with open("vulnerability_report.json", "wb") as f:
+        f.write(report.model_dump_json(indent=2).encode())
     print("✅ vulnerability_report.json")
     
     # Save HTML report
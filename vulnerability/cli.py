@@ -313,12 +313,8 @@ def show_info(args):
 def save_report(report, output_file: str, format_type: str):
     """Save report in specified format"""
     if format_type == 'json':
-        with open(output_file, 'w') as f:
-            # FIX: .dict() is Pydantic v1's method name -- it still works on
-            # the currently installed Pydantic 2.x, but only with a
-            # deprecation warning ("to be removed in a future version").
-            # .model_dump() is the correct v2 method with the same behavior.
-            json.dump(report.model_dump(), f, indent=2, default=str)
+        with open(output_file, 'wb') as f:
+            f.write(report.model_dump_json(indent=2).encode())
     
     elif format_type == 'html':
         html_content = generate_html_report(report)